@@ -8,21 +8,35 @@ from src.init import init_devika
 init_devika()
 
 
-from flask import Flask, request, jsonify, send_file, send_from_directory, render_template_string
+from flask import Flask, Response, request, stream_with_context, jsonify, send_file, send_from_directory, render_template_string
 from flask_cors import CORS
-from src.socket_instance import socketio, emit_agent
+import src.socket_instance
+from src.socket_instance import socketio
 import os
 import logging
 from threading import Thread
 import tiktoken
 
+from src.socket_batcher import EmitBatcher
+
+# Agent events go through the batcher. Modules import `emit_agent` by name, so
+# it has to be rebound before src.agents, src.state and src.project are loaded.
+emit_batcher = EmitBatcher(socketio, relay_remote=os.environ.get("DEVIKA_MULTIPROCESS") == "1")
+src.socket_instance.emit_agent = emit_agent = emit_batcher.emit
+
 from src.apis.project import project_bp
-from src.config import Config
+from src.config_store import config_store, get_config
 from src.logger import Logger, route_logger
 from src.project import ProjectManager
+from src.project_export import ProjectExporter, SnapshotNotFound, content_disposition
+from src.project_paths import resolve_project_dir
+from src.sandbox import SandboxPool
 from src.state import AgentState
 from src.agents import Agent
 from src.llm import LLM
+from src.llm.circuit_breaker import provider_health
+from src.monitoring.metrics import metrics
+from src.monitoring.tracing import trace_run, load_run, list_runs
 
 
 app = Flask(__name__)
@@ -32,7 +46,18 @@ CORS(app, resources={r"/*": {"origins": [
                                  "http://localhost:3000",
                                  ]}})
 app.register_blueprint(project_bp)
-socketio.init_app(app)
+if os.environ.get("DEVIKA_MULTIPROCESS") == "1":
+    # Several server processes share the SQLite DB (in WAL mode) and relay
+    # Socket.IO events to each other through a table in a sibling DB file.
+    from src.database.sqlite_wal import connect as connect_sqlite, enable_wal_everywhere
+    from src.message_bus import SQLiteManager
+    enable_wal_everywhere()
+    sqlite_db = get_config().get_sqlite_db()
+    connect_sqlite(sqlite_db).close()
+    socketio.init_app(app, client_manager=SQLiteManager(
+        os.path.join(os.path.dirname(sqlite_db), "socketio-bus.db")))
+else:
+    socketio.init_app(app)
 
 
 log = logging.getLogger("werkzeug")
@@ -44,9 +69,16 @@ TIKTOKEN_ENC = tiktoken.get_encoding("cl100k_base")
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
 manager = ProjectManager()
+exporter = ProjectExporter()
+sandbox = SandboxPool()
 agent_state = AgentState()
-config = Config()
 logger = Logger()
+emit_batcher.logger = logger
+metrics.register_queue("socket_emit", emit_batcher.buffered)
+metrics.counter("devika_socket_events_emitted_total", "Events sent by the emit batcher.", callback=lambda: emit_batcher.emitted)
+metrics.counter("devika_socket_events_dropped_total", "Events dropped by emit batcher backpressure.", callback=lambda: emit_batcher.dropped)
+
+config_store.subscribe(lambda snapshot: setattr(provider_health, "max_timeout", snapshot.get_timeout_inference()))
 
 
 # Root route to serve main UI
@@ -226,6 +258,27 @@ def index():
     """
     return html_content
 
+metrics.instrument_app(app)
+
+
+@socketio.on('connect')
+def count_connect():
+    metrics.socket_connections.inc()
+    emit_batcher.connect(request.sid)
+    emit_batcher.start()
+
+
+@socketio.on('disconnect')
+def count_disconnect():
+    metrics.socket_connections.dec()
+    emit_batcher.disconnect(request.sid)
+
+
+@socketio.on('batch-events')
+def enable_batching(data):
+    emit_batcher.set_batching(request.sid, bool(data.get("enabled", True)))
+
+
 # initial socket
 @socketio.on('socket_connect')
 def test_connect(data):
@@ -250,6 +303,11 @@ def get_messages():
     return jsonify({"messages": messages})
 
 
+def traced_run(target, message, project_name, profile=False):
+    with trace_run(project_name, f"agent.{target.__name__}", profile=profile):
+        target(message, project_name)
+
+
 # Main socket
 @socketio.on('user-message')
 def handle_message(data):
@@ -258,27 +316,66 @@ def handle_message(data):
     base_model = data.get('base_model')
     project_name = data.get('project_name')
     search_engine = data.get('search_engine').lower()
+    profile = bool(data.get('profile', False))
 
     agent = Agent(base_model=base_model, search_engine=search_engine)
 
     state = agent_state.get_latest_state(project_name)
+    thread_name = f"agent:{project_name}"
     if not state:
-        thread = Thread(target=lambda: agent.execute(message, project_name))
+        thread = Thread(target=lambda: traced_run(agent.execute, message, project_name, profile), name=thread_name)
         thread.start()
     else:
         if agent_state.is_agent_completed(project_name):
-            thread = Thread(target=lambda: agent.subsequent_execute(message, project_name))
+            thread = Thread(target=lambda: traced_run(agent.subsequent_execute, message, project_name, profile), name=thread_name)
             thread.start()
         else:
             emit_agent("info", {"type": "warning", "message": "previous agent doesn't completed it's task."})
             last_state = agent_state.get_latest_state(project_name)
             if last_state and (last_state.get("agent_is_active") or not last_state.get("completed")):
-                thread = Thread(target=lambda: agent.execute(message, project_name))
+                thread = Thread(target=lambda: traced_run(agent.execute, message, project_name, profile), name=thread_name)
                 thread.start()
             else:
-                thread = Thread(target=lambda: agent.subsequent_execute(message, project_name))
+                thread = Thread(target=lambda: traced_run(agent.subsequent_execute, message, project_name, profile), name=thread_name)
                 thread.start()
 
+@app.route("/api/export-project", methods=["GET"])
+@route_logger(logger)
+def export_project():
+    project_name = request.args.get("project_name")
+    since = request.args.get("since")
+    if not project_name:
+        return jsonify({"error": "project_name is required"}), 400
+    try:
+        snapshot_id, chunks = exporter.export(project_name, since=since)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except FileNotFoundError:
+        return jsonify({"error": f"project {project_name} not found"}), 404
+    except SnapshotNotFound:
+        return jsonify({"error": f"snapshot {since} not found"}), 404
+
+    filename = f"{project_name}-{snapshot_id}.zip"
+    return Response(
+        stream_with_context(chunks),
+        mimetype="application/zip",
+        headers={"Content-Disposition": content_disposition(filename), "X-Snapshot-Id": snapshot_id},
+    )
+
+
+@app.route("/api/project-snapshots", methods=["GET"])
+@route_logger(logger)
+def project_snapshots():
+    project_name = request.args.get("project_name")
+    if not project_name:
+        return jsonify({"error": "project_name is required"}), 400
+    try:
+        snapshots = exporter.list_snapshots(project_name)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"snapshots": snapshots})
+
+
 @app.route("/api/is-agent-active", methods=["POST"])
 @route_logger(logger)
 def is_agent_active():
@@ -328,13 +425,47 @@ def get_terminal_session():
         return jsonify({"terminal_state": terminal_state})
 
 
+@app.route("/api/run-trace", methods=["GET"])
+@route_logger(logger)
+def run_trace():
+    project_name = request.args.get("project_name")
+    run_id = request.args.get("run_id")
+    if not project_name:
+        return jsonify({"error": "project_name is required"}), 400
+    try:
+        if request.args.get("format") == "folded":
+            folded = load_run(project_name, run_id, profile=True)
+            if folded is None:
+                return jsonify({"error": "no profile for this run"}), 404
+            return Response(folded, mimetype="text/plain")
+        trace = load_run(project_name, run_id)
+        runs = list_runs(project_name)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"runs": runs, "trace": trace})
+
+
 @app.route("/api/run-code", methods=["POST"])
 @route_logger(logger)
 def run_code():
     data = request.json
     project_name = data.get("project_name")
     code = data.get("code")
-    # TODO: Implement code execution logic
+    if not project_name or not code:
+        return jsonify({"error": "project_name and code are required"}), 400
+    try:
+        resolve_project_dir(project_name)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def execute():
+        def on_output(stream, text):
+            emit_batcher.emit("code-output", {"project_name": project_name, "stream": stream, "data": text}, False)
+
+        result = sandbox.run(project_name, code, on_output)
+        emit_batcher.emit("code-exit", {"project_name": project_name, **result.to_dict()})
+
+    Thread(target=execute, name=f"sandbox:{project_name}").start()
     return jsonify({"message": "Code execution started"})
 
 
@@ -365,14 +496,14 @@ def real_time_logs():
 @route_logger(logger)
 def set_settings():
     data = request.json
-    config.update_config(data)
+    config_store.update(data)
     return jsonify({"message": "Settings updated"})
 
 
 @app.route("/api/settings", methods=["GET"])
 @route_logger(logger)
 def get_settings():
-    configs = config.get_config()
+    configs = get_config().get_config()
     return jsonify({"settings": configs})
 
 
@@ -381,6 +512,23 @@ def get_settings():
 def status():
     return jsonify({"status": "server is running!"})
 
+
+@app.route("/api/status/providers", methods=["GET"])
+@route_logger(logger)
+def provider_status():
+    return jsonify({"providers": provider_health.status()})
+
+
+@app.route("/api/status/socket", methods=["GET"])
+@route_logger(logger)
+def socket_status():
+    return jsonify({"socket": emit_batcher.stats()})
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     # Initialize and start PipelineRunner
     try:
@@ -392,5 +540,7 @@ if __name__ == "__main__":
         logger.error(f"Failed to initialize PipelineRunner: {e}")
         logger.info("Continuing without PipelineRunner...")
     
+    metrics.loop_lag_monitor.start()
+    sandbox.start()
     logger.info("Devika is up and running!")
-    socketio.run(app, debug=False, port=1337, host="0.0.0.0")
\ No newline at end of file
+    socketio.run(app, debug=False, port=int(os.environ.get("DEVIKA_PORT", 1337)), host="0.0.0.0")
\ No newline at end of file
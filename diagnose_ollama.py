@@ -15,7 +15,7 @@ from typing import List, Dict, Any
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 try:
-    from src.config import Config
+    from src.config_store import get_config
     from src.logger import Logger
     from src.llm.ollama_client import Ollama
 except ImportError as e:
@@ -25,7 +25,7 @@ except ImportError as e:
 
 class OllamaDiagnostic:
     def __init__(self):
-        self.config = Config()
+        self.config = get_config()
         self.logger = Logger()
         self.endpoint = self.config.get_ollama_api_endpoint()
         
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Record a real Devika run once, then replay it offline as a benchmark and
+regression check for the orchestration code (no Ollama, GPU or network).
+
+    python replay_agent.py record fixtures/todo.json "Create a to-do app" --model phi:latest
+    python replay_agent.py replay fixtures/todo.json --runs 5 --max-seconds 2.0
+
+With `--pipeline` the run goes through `PipelineRunner.run_pipeline` instead
+of `Agent.execute`.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import traceback
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from src.replay import record, replay, ReplayMissError
+
+
+def positive_int(value):
+    runs = int(value)
+    if runs < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return runs
+
+
+def run_once(prompt, project_name, model, search_engine, pipeline):
+    if pipeline:
+        from pipeline_runner.main import PipelineRunner
+        PipelineRunner().run_pipeline(prompt)
+    else:
+        from src.agents import Agent
+        Agent(base_model=model, search_engine=search_engine).execute(prompt, project_name)
+
+
+def cmd_record(args):
+    metadata = {
+        "prompt": args.prompt,
+        "project_name": args.project,
+        "model": args.model,
+        "search_engine": args.search_engine,
+        "pipeline": args.pipeline,
+    }
+    print(f"[INFO] Recording run into {args.fixture}")
+    start = time.perf_counter()
+    with record(args.fixture, metadata=metadata) as recorder:
+        run_once(args.prompt, args.project, args.model, args.search_engine, args.pipeline)
+    if recorder.unrecordable:
+        for problem in recorder.unrecordable:
+            print(f"[ERROR] {problem}")
+        print("[ERROR] The fixture is incomplete and cannot be replayed")
+        return False
+    print(f"[OK] Recorded {len(recorder.calls)} calls in {time.perf_counter() - start:.2f}s")
+    return True
+
+
+def cmd_replay(args):
+    with open(args.fixture) as f:
+        metadata = json.load(f)["metadata"]
+
+    timings = []
+    for i in range(args.runs):
+        start = time.perf_counter()
+        try:
+            with replay(args.fixture, strict=not args.fuzzy) as replayer:
+                run_once(metadata["prompt"], metadata["project_name"], metadata["model"],
+                         metadata["search_engine"], metadata["pipeline"])
+        except ReplayMissError as e:
+            print(f"[ERROR] Run {i + 1} diverged from the recording: {e}")
+            return False
+        except Exception as e:
+            print(f"[ERROR] Run {i + 1} failed: {e}")
+            traceback.print_exc()
+            return False
+        timings.append(time.perf_counter() - start)
+
+        stats = replayer.stats()
+        if stats["misses"]:
+            # The agent may have caught the ReplayMissError and carried on.
+            print(f"[ERROR] Run {i + 1} made {stats['misses']} calls the recording has no result for")
+            return False
+        if stats["replayed"] + stats["fuzzy_matches"] != stats["recorded_calls"]:
+            print(f"[ERROR] Run {i + 1} replayed {stats['replayed'] + stats['fuzzy_matches']} "
+                  f"of {stats['recorded_calls']} recorded calls")
+            return False
+
+    median = statistics.median(timings)
+    print(f"[OK] Replayed {stats['replayed']}/{stats['recorded_calls']} calls "
+          f"({stats['fuzzy_matches']} fuzzy) x {args.runs} runs")
+    print(f"   Recorded wall time: {stats['recorded_wall_seconds']:.2f}s "
+          f"(I/O {stats['recorded_io_seconds']:.2f}s)")
+    print(f"   Orchestration time: min {min(timings):.3f}s, median {median:.3f}s, max {max(timings):.3f}s")
+
+    if args.max_seconds is not None and median > args.max_seconds:
+        print(f"[ERROR] Median {median:.3f}s exceeds budget of {args.max_seconds:.3f}s")
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay Devika runs offline")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rec = subparsers.add_parser("record", help="run for real and capture all LLM/search/crawl I/O")
+    rec.add_argument("fixture")
+    rec.add_argument("prompt")
+    rec.add_argument("--project", default="replay-benchmark")
+    rec.add_argument("--model", default="phi:latest")
+    rec.add_argument("--search-engine", default="duckduckgo")
+    rec.add_argument("--pipeline", action="store_true", help="use PipelineRunner.run_pipeline")
+
+    rep = subparsers.add_parser("replay", help="replay a fixture offline and report timings")
+    rep.add_argument("fixture")
+    rep.add_argument("--runs", type=positive_int, default=3)
+    rep.add_argument("--max-seconds", type=float, default=None, help="fail if the median run is slower")
+    rep.add_argument("--fuzzy", action="store_true", help="match calls by order when arguments differ")
+
+    args = parser.parse_args()
+    success = cmd_record(args) if args.command == "record" else cmd_replay(args)
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
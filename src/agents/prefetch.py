@@ -0,0 +1,191 @@
+"""
+Speculative research prefetch while the Planner is still generating.
+
+`Agent.execute` normally runs Planner -> Researcher -> search -> crawl one
+after another. `ResearchPrefetcher` starts web searches and page fetches for
+likely queries while the plan is still streaming. Candidates come from plan
+steps as they complete and/or KeyBERT keywords of the prompt. Once the
+Researcher has produced the real query list, `resolve()` hands back whatever
+was already fetched for those queries and fetches the rest. Speculative
+pages are only added to the crawl cache when a final query uses them.
+Everything else is cancelled or dropped.
+
+Pages land in the `cache` passed to the prefetcher, which defaults to the
+process-wide `default_crawl_cache()`. The Agent's crawl step must read from
+that same cache (pass its own, or look pages up in `default_crawl_cache()`),
+otherwise prefetched pages are fetched a second time.
+
+`Agent.execute` does not call this yet; the sketch below is where it plugs
+in:
+
+    prefetcher = ResearchPrefetcher(search, fetch, cache=default_crawl_cache())
+    prefetcher.seed_from_prompt(prompt)
+    for chunk in planner_stream:
+        prefetcher.feed_plan(chunk)
+    prefetcher.finish()
+    ...
+    pages = prefetcher.resolve(researcher_output["queries"])
+"""
+
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.monitoring.tracing import attach, current_run, current_span, span
+
+
+STEP_PATTERN = re.compile(r"^\s*(?:-\s*)?(?:step\s*\d+\s*[:.)-]|\d+\s*[.)])\s*(.+)$", re.IGNORECASE)
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "to", "of", "for", "in", "on", "with", "by",
+    "create", "write", "make", "build", "implement", "add", "use", "using",
+    "that", "this", "it", "is", "be", "then", "will", "should", "file", "code",
+}
+
+crawl_cache = None
+
+
+def default_crawl_cache():
+    global crawl_cache
+    if crawl_cache is None:
+        from src.cache import MemoryCache
+        crawl_cache = MemoryCache()
+    return crawl_cache
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.strip().lower().split())
+
+
+def query_terms(query: str) -> set:
+    return {w for w in re.findall(r"[a-z0-9+#.]+", query.lower()) if w not in STOPWORDS}
+
+
+class ResearchPrefetcher:
+    def __init__(self, search, fetch, max_queries: int = 4, max_workers: int = 4,
+                 match_threshold: float = 0.5, cache_ttl: int = 3600, cache=None):
+        """
+        `search(query) -> url` and `fetch(url) -> content` are the same calls
+        `Agent.search_queries` makes; `match_threshold` is the term overlap a
+        final query needs with a speculative one to reuse its result.
+        """
+        self.search = search
+        self.fetch = fetch
+        self.cache = default_crawl_cache() if cache is None else cache
+        self.max_queries = max_queries
+        self.match_threshold = match_threshold
+        self.cache_ttl = cache_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._futures = {}
+        self._buffer = ""
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+
+    def _speculative_fetch(self, run, parent, query: str):
+        # Runs on a pool thread: attach it to the agent's trace so the
+        # speculative search/fetch shows up under the span that started it.
+        with attach(run, parent), span("prefetch.speculate", query=query):
+            return self._fetch_query(query, speculative=True)
+
+    def _fetch_query(self, query: str, speculative: bool = False):
+        url = self.search(query)
+        if not url:
+            return None, None
+        cached = self.cache.get(url)
+        if cached is not None:
+            return url, cached
+        content = self.fetch(url)
+        if not speculative:
+            self.cache.set(url, content, ttl=self.cache_ttl)
+        return url, content
+
+    def speculate(self, query: str):
+        query = normalize_query(query)
+        if not query_terms(query):
+            return
+        with self._lock:
+            if query in self._futures or len(self._futures) >= self.max_queries:
+                return
+            self._futures[query] = self._executor.submit(
+                self._speculative_fetch, current_run(), current_span(), query
+            )
+
+    def seed_from_prompt(self, prompt: str, keywords: list = None):
+        """Speculate on the prompt's keywords (KeyBERT when none are given)."""
+        if keywords is None:
+            try:
+                from src.bert.sentence import SentenceBert
+                keywords = SentenceBert(prompt).extract_keywords()
+            except Exception:
+                return
+        terms = [k[0] if isinstance(k, (tuple, list)) else k for k in keywords]
+        if terms:
+            self.speculate(" ".join(terms[:5]))
+
+    def feed_plan(self, chunk: str):
+        """Consume streamed Planner output, speculating on each completed step line."""
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            match = STEP_PATTERN.match(line)
+            if match:
+                self.speculate(match.group(1))
+
+    def finish(self):
+        """Speculate on a last plan step that had no trailing newline."""
+        line, self._buffer = self._buffer, ""
+        match = STEP_PATTERN.match(line)
+        if match:
+            self.speculate(match.group(1))
+
+    def _match(self, query: str):
+        terms = query_terms(query)
+        best, best_score = None, 0.0
+        for candidate in self._futures:
+            candidate_terms = query_terms(candidate)
+            union = terms | candidate_terms
+            score = len(terms & candidate_terms) / len(union) if union else 0.0
+            if score > best_score:
+                best, best_score = candidate, score
+        return best if best_score >= self.match_threshold else None
+
+    def resolve(self, queries: list) -> dict:
+        """
+        Return `{query: (url, content)}` for the Researcher's final queries,
+        reusing speculative fetches where they match and discarding the rest.
+        """
+        self.finish()
+        with span("prefetch.resolve", queries=len(queries)) as s:
+            with self._lock:
+                used = {}
+                for query in queries:
+                    match = self._match(normalize_query(query))
+                    if match is not None and match not in used.values():
+                        used[query] = match
+                unused = [q for q in self._futures if q not in used.values()]
+                for query in unused:
+                    self._futures.pop(query).cancel()
+                    self.discarded += 1
+
+            results = {}
+            for query in queries:
+                future = self._futures.get(used.get(query))
+                if future is not None:
+                    try:
+                        url, content = future.result()
+                    except Exception:
+                        url = None
+                    if url:
+                        self.cache.set(url, content, ttl=self.cache_ttl)
+                        results[query] = (url, content)
+                        self.hits += 1
+                        continue
+                results[query] = self._fetch_query(normalize_query(query))
+                self.misses += 1
+            s.set(prefetch_hits=self.hits, prefetch_misses=self.misses, prefetch_discarded=self.discarded)
+        self.close()
+        return results
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,233 @@
+"""
+Process-wide, immutable configuration snapshot with file-watch reload.
+
+`get_config()` returns the current `ConfigSnapshot`. Accessors read from
+dicts already in memory, so hot paths such as `get_ollama_api_endpoint()` do
+no file I/O or TOML parsing. A daemon thread polls the mtime of
+`config.toml` and atomically swaps in a new snapshot when the file changes.
+Settings saved through `/api/settings` in any server process therefore reach
+every other process without a restart. `update()` writes the file via a
+temp file + rename, so readers never see a partially written config.
+"""
+
+import copy
+import os
+import threading
+import time
+from types import MappingProxyType
+
+import toml
+
+
+CONFIG_FILE = "config.toml"
+SAMPLE_CONFIG_FILE = "sample.config.toml"
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    return value
+
+
+def _as_bool(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() == "true"
+    return bool(value)
+
+
+class ConfigSnapshot:
+    def __init__(self, data: dict, version: int):
+        self._data = _freeze(data)
+        self.version = version
+
+    def as_dict(self) -> dict:
+        return {section: dict(values) for section, values in self._data.items()}
+
+    def get(self, section: str, key: str, default=None):
+        return self._data.get(section, {}).get(key, default)
+
+    def get_config(self) -> dict:
+        return self.as_dict()
+
+    # API_ENDPOINTS
+
+    def get_bing_api_endpoint(self) -> str:
+        return self.get("API_ENDPOINTS", "BING")
+
+    def get_google_search_api_endpoint(self) -> str:
+        return self.get("API_ENDPOINTS", "GOOGLE")
+
+    def get_ollama_api_endpoint(self) -> str:
+        return self.get("API_ENDPOINTS", "OLLAMA")
+
+    def get_lmstudio_api_endpoint(self) -> str:
+        return self.get("API_ENDPOINTS", "LM_STUDIO")
+
+    def get_openai_api_endpoint(self) -> str:
+        return self.get("API_ENDPOINTS", "OPENAI")
+
+    # API_KEYS
+
+    def get_bing_api_key(self) -> str:
+        return self.get("API_KEYS", "BING")
+
+    def get_google_search_api_key(self) -> str:
+        return self.get("API_KEYS", "GOOGLE_SEARCH")
+
+    def get_google_search_engine_id(self) -> str:
+        return self.get("API_KEYS", "GOOGLE_SEARCH_ENGINE_ID")
+
+    def get_claude_api_key(self) -> str:
+        return self.get("API_KEYS", "CLAUDE")
+
+    def get_openai_api_key(self) -> str:
+        return self.get("API_KEYS", "OPENAI")
+
+    def get_gemini_api_key(self) -> str:
+        return self.get("API_KEYS", "GEMINI")
+
+    def get_mistral_api_key(self) -> str:
+        return self.get("API_KEYS", "MISTRAL")
+
+    def get_groq_api_key(self) -> str:
+        return self.get("API_KEYS", "GROQ")
+
+    def get_netlify_api_key(self) -> str:
+        return self.get("API_KEYS", "NETLIFY")
+
+    # STORAGE
+
+    def get_sqlite_db(self) -> str:
+        return self.get("STORAGE", "SQLITE_DB")
+
+    def get_screenshots_dir(self) -> str:
+        return self.get("STORAGE", "SCREENSHOTS_DIR")
+
+    def get_pdfs_dir(self) -> str:
+        return self.get("STORAGE", "PDFS_DIR")
+
+    def get_projects_dir(self) -> str:
+        return self.get("STORAGE", "PROJECTS_DIR")
+
+    def get_logs_dir(self) -> str:
+        return self.get("STORAGE", "LOGS_DIR")
+
+    def get_repos_dir(self) -> str:
+        return self.get("STORAGE", "REPOS_DIR")
+
+    # LOGGING / TIMEOUT / PARAMETERS
+
+    def get_logging_rest_api(self) -> bool:
+        return _as_bool(self.get("LOGGING", "LOG_REST_API", False))
+
+    def get_logging_prompts(self) -> bool:
+        return _as_bool(self.get("LOGGING", "LOG_PROMPTS", False))
+
+    def get_timeout_inference(self) -> float:
+        return float(self.get("TIMEOUT", "INFERENCE", 60))
+
+    def get_temperature(self) -> float:
+        return float(self.get("PARAMETERS", "TEMPERATURE", 0.7))
+
+    def get_top_p(self) -> float:
+        return float(self.get("PARAMETERS", "TOP_P", 0.9))
+
+
+class ConfigStore:
+    def __init__(self, path: str = CONFIG_FILE, sample_path: str = SAMPLE_CONFIG_FILE,
+                 poll_interval: float = 1.0):
+        self.path = path
+        self.sample_path = sample_path
+        self.poll_interval = poll_interval
+        self._stamp = None
+        self._snapshot = None
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._watcher = None
+        self.reload()
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    def _read(self) -> dict:
+        data = {}
+        if os.path.exists(self.sample_path):
+            data = toml.load(self.sample_path)
+        if os.path.exists(self.path):
+            for section, values in toml.load(self.path).items():
+                if isinstance(values, dict):
+                    data.setdefault(section, {}).update(values)
+                else:
+                    data[section] = values
+        return data
+
+    def reload(self, force: bool = False) -> bool:
+        """Swap in a new snapshot if the file changed; return True when swapped."""
+        with self._lock:
+            stamp = self._file_stamp()
+            if not force and self._snapshot is not None and stamp == self._stamp:
+                return False
+            try:
+                data = self._read()
+            except (toml.TomlDecodeError, OSError):
+                # A half-written file from an editor; keep serving the old snapshot.
+                return False
+            version = self._snapshot.version + 1 if self._snapshot else 1
+            self._snapshot = ConfigSnapshot(data, version)
+            self._stamp = stamp
+            snapshot, subscribers = self._snapshot, list(self._subscribers)
+        for callback in subscribers:
+            callback(snapshot)
+        return True
+
+    def snapshot(self) -> ConfigSnapshot:
+        if self._watcher is None:
+            self.start_watching()
+        return self._snapshot
+
+    def subscribe(self, callback):
+        """Call `callback(snapshot)` now and after every reload."""
+        with self._lock:
+            self._subscribers.append(callback)
+        callback(self._snapshot)
+
+    def update(self, data: dict) -> ConfigSnapshot:
+        """Merge `{section: {key: value}}` into config.toml and publish it."""
+        with self._lock:
+            current = toml.load(self.path) if os.path.exists(self.path) else {}
+            merged = copy.deepcopy(current)
+            for section, values in data.items():
+                if isinstance(values, dict):
+                    merged.setdefault(section, {}).update(values)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                toml.dump(merged, f)
+            os.replace(tmp_path, self.path)
+        self.reload(force=True)
+        return self._snapshot
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.reload()
+            except Exception:
+                pass
+
+    def start_watching(self):
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(target=self._watch, name="config-watcher", daemon=True)
+        self._watcher.start()
+
+
+config_store = ConfigStore()
+
+
+def get_config() -> ConfigSnapshot:
+    return config_store.snapshot()
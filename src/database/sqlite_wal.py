@@ -0,0 +1,76 @@
+"""
+SQLite settings for sharing one database between several server processes.
+
+WAL mode lets readers proceed while one process writes, and `busy_timeout`
+makes concurrent writers wait for the lock instead of failing immediately
+with "database is locked". `synchronous=NORMAL` is durable in WAL mode
+against application crashes and avoids an fsync on every commit.
+
+Pragmas are per connection. `enable_wal_everywhere()` registers them once
+for every SQLAlchemy engine in the process, including the SQLModel engines
+that ProjectManager and AgentState create.
+
+`foreign_keys` is deliberately left at SQLite's default (off): enabling it
+would start rejecting writes against rows that existing databases may
+already reference inconsistently.
+"""
+
+import sqlite3
+
+
+PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("busy_timeout", 5000),
+    ("cache_size", -16000),      # 16 MB page cache per connection
+    ("mmap_size", 134217728),    # 128 MB memory-mapped reads
+    ("temp_store", "MEMORY"),
+    ("wal_autocheckpoint", 1000),
+)
+
+_global_listener = False
+
+
+def apply_pragmas(connection):
+    """Apply PRAGMAS to a DB-API connection (sqlite3 or SQLAlchemy's raw connection)."""
+    cursor = connection.cursor()
+    for name, value in PRAGMAS:
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def connect(path: str, **kwargs) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, timeout=5.0, check_same_thread=False, **kwargs)
+    apply_pragmas(connection)
+    return connection
+
+
+def enable_wal(engine):
+    """
+    Apply PRAGMAS to every connection a SQLAlchemy/SQLModel engine opens:
+
+        engine = enable_wal(create_engine(f"sqlite:///{sqlite_path}"))
+    """
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection)
+
+    return engine
+
+
+def enable_wal_everywhere():
+    """Apply PRAGMAS to every SQLite connection opened by any SQLAlchemy engine."""
+    global _global_listener
+    if _global_listener:
+        return
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    @event.listens_for(Engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        if isinstance(dbapi_connection, sqlite3.Connection):
+            apply_pragmas(dbapi_connection)
+
+    _global_listener = True
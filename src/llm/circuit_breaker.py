@@ -0,0 +1,211 @@
+"""
+Per-provider/per-model circuit breakers and adaptive inference timeouts.
+
+A single `[TIMEOUT] INFERENCE` value makes every agent step wait the full
+timeout when a provider is down. Each (provider, model) pair gets its own
+breaker that opens after consecutive failures and lets a single probe
+through once the recovery window has passed. Timeouts are derived from the
+observed per-token latency of recent successful calls, scaled by the
+requested `max_tokens`, and capped by the configured INFERENCE timeout.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from src.monitoring.metrics import metrics
+from src.monitoring.tracing import span
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the breaker is open."""
+
+    def __init__(self, provider: str, model: str, retry_in: float):
+        self.provider = provider
+        self.model = model
+        self.retry_in = retry_in
+        super().__init__(
+            f"{provider}/{model} is unavailable (circuit open), retry in {retry_in:.1f}s"
+        )
+
+
+class LatencyTracker:
+    """Sliding window of per-token latencies for one model."""
+
+    def __init__(self, window: int = 50):
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds: float, tokens: int):
+        self.samples.append(seconds / max(tokens, 1))
+
+    def percentile(self, pct: float):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1)
+        return ordered[max(index, 0)]
+
+
+class CircuitBreaker:
+    def __init__(self, provider: str, model: str,
+                 failure_threshold: int = 3, recovery_time: float = 30.0):
+        self.provider = provider
+        self.model = model
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.latency = LatencyTracker()
+
+        self.total_successes = 0
+        self.total_failures = 0
+        self.total_rejected = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Return True if a call may proceed, moving OPEN -> HALF_OPEN when due."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.recovery_time:
+                self.state = HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            self.total_rejected += 1
+            return False
+
+    def retry_in(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.recovery_time - (time.monotonic() - self.opened_at))
+
+    def record_success(self, seconds: float, tokens: int = 1):
+        with self._lock:
+            self.latency.record(seconds, tokens)
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+            self.total_successes += 1
+
+    def record_failure(self, error: Exception = None):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.total_failures += 1
+            self.probe_in_flight = False
+            if error is not None:
+                self.last_error = str(error)
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        p50 = self.latency.percentile(50)
+        p95 = self.latency.percentile(95)
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in": round(self.retry_in(), 2),
+            "successes": self.total_successes,
+            "failures": self.total_failures,
+            "rejected": self.total_rejected,
+            "p50_seconds_per_token": p50,
+            "p95_seconds_per_token": p95,
+            "last_error": self.last_error,
+        }
+
+
+class ProviderHealth:
+    """
+    Registry of circuit breakers keyed by (provider, model).
+
+    `LLM.inference` should ask `timeout_for()` instead of using the fixed
+    INFERENCE value and wrap the provider call in `guard()`:
+
+        with provider_health.guard("OLLAMA", model_id, max_tokens) as call:
+            response = client.inference(model_id, prompt)
+            call.tokens = len(response_tokens)
+    """
+
+    # Multiplier applied to the p95 per-token latency, and the floor used when
+    # there are too few samples or a small max_tokens would give an unrealistic
+    # budget (model load, prompt processing).
+    HEADROOM = 3.0
+    MIN_TIMEOUT = 10.0
+    MIN_SAMPLES = 5
+
+    def __init__(self, max_timeout: float = 60.0,
+                 failure_threshold: int = 3, recovery_time: float = 30.0):
+        self.max_timeout = max_timeout
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, provider: str, model: str) -> CircuitBreaker:
+        key = (provider.upper(), model)
+        with self._lock:
+            if key not in self._breakers:
+                self._breakers[key] = CircuitBreaker(
+                    key[0], model, self.failure_threshold, self.recovery_time
+                )
+            return self._breakers[key]
+
+    def timeout_for(self, provider: str, model: str, max_tokens: int = 1024) -> float:
+        latency = self.breaker(provider, model).latency
+        p95 = latency.percentile(95)
+        if p95 is None or len(latency.samples) < self.MIN_SAMPLES:
+            return self.max_timeout
+        adaptive = p95 * max_tokens * self.HEADROOM
+        return min(self.max_timeout, max(self.MIN_TIMEOUT, adaptive))
+
+    @contextmanager
+    def guard(self, provider: str, model: str, max_tokens: int = 1024):
+        breaker = self.breaker(provider, model)
+        if not breaker.allow_request():
+            raise CircuitOpenError(breaker.provider, model, breaker.retry_in())
+
+        call = _Call(self.timeout_for(provider, model, max_tokens), max_tokens)
+        with span("llm", provider=breaker.provider, model=model) as llm_span:
+            start = time.monotonic()
+            try:
+                yield call
+            except BaseException as e:
+                # BaseException too: gevent.Timeout (how call.timeout is
+                # enforced) and GreenletExit must still release the probe.
+                breaker.record_failure(e)
+                metrics.observe_llm_error(breaker.provider, model)
+                raise
+            elapsed = time.monotonic() - start
+            breaker.record_success(elapsed, call.tokens or max_tokens)
+            metrics.observe_llm(breaker.provider, model, elapsed, call.tokens or 0)
+            llm_span.add(tokens=call.tokens or 0)
+
+    def status(self) -> list:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return [b.snapshot() for b in breakers]
+
+
+class _Call:
+    def __init__(self, timeout: float, max_tokens: int):
+        self.timeout = timeout
+        self.tokens = None
+        self.max_tokens = max_tokens
+
+
+provider_health = ProviderHealth()
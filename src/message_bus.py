@@ -0,0 +1,72 @@
+"""
+Socket.IO message bus for running several Devika server processes.
+
+`SQLiteManager` is a python-socketio client manager that relays emits,
+room changes and disconnects between processes through a table in a shared
+SQLite database in WAL mode. No external broker is needed. Every process
+appends messages and tails the table from the highest id it has seen, so an
+agent running in one process reaches clients connected to any other. Old
+rows are pruned once they are older than `retention` seconds.
+"""
+
+import json
+import threading
+import time
+
+from socketio import PubSubManager
+
+from src.database.sqlite_wal import connect
+
+
+class SQLiteManager(PubSubManager):
+    name = "sqlite"
+
+    def __init__(self, path: str, channel: str = "socketio", write_only: bool = False,
+                 poll_interval: float = 0.02, retention: float = 60.0, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._last_prune = 0.0
+
+        connection = connect(self.path)
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS socketio_bus ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "channel TEXT NOT NULL, "
+                "created REAL NOT NULL, "
+                "payload TEXT NOT NULL)"
+            )
+        connection.close()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    def _publish(self, data):
+        payload = json.dumps(data)
+        now = time.time()
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = connect(self.path)
+            with self._writer:
+                self._writer.execute(
+                    "INSERT INTO socketio_bus (channel, created, payload) VALUES (?, ?, ?)",
+                    (self.channel, now, payload),
+                )
+                if now - self._last_prune > self.retention:
+                    self._writer.execute("DELETE FROM socketio_bus WHERE created < ?", (now - self.retention,))
+                    self._last_prune = now
+
+    def _listen(self):
+        reader = connect(self.path)
+        row = reader.execute("SELECT COALESCE(MAX(id), 0) FROM socketio_bus").fetchone()
+        last_id = row[0]
+        while True:
+            rows = reader.execute(
+                "SELECT id, payload FROM socketio_bus WHERE id > ? AND channel = ? ORDER BY id",
+                (last_id, self.channel),
+            ).fetchall()
+            for last_id, payload in rows:
+                yield json.loads(payload)
+            if not rows:
+                self.server.sleep(self.poll_interval)
@@ -0,0 +1,280 @@
+"""
+Prometheus-style metrics with low-overhead instrumentation hooks.
+
+The agents, `LLMConnector` and the Flask/Socket.IO layer emit into the
+module-level `metrics` registry; `/metrics` renders it in the Prometheus
+text exposition format. Recording is a dict lookup plus a few additions
+under a lock, so it is safe to call on hot paths.
+"""
+
+import bisect
+import os
+import threading
+import time
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labels=(), callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.callback = callback
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def _render_values(self) -> list:
+        if self.callback is not None:
+            try:
+                value = self.callback()
+            except Exception:
+                value = None
+            if value is not None:
+                with self._lock:
+                    self._values[()] = value
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labels, key)} {value}" for key, value in items
+        ]
+
+
+class Counter(_Metric):
+    """
+    Monotonic counter. With `callback`, the value is read from an existing
+    monotonic tally (e.g. `emit_batcher.emitted`) on every scrape.
+    """
+
+    kind = "counter"
+
+    def inc(self, *label_values, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> list:
+        return self._render_values()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, *label_values, value: float):
+        with self._lock:
+            self._values[label_values] = value
+
+    def inc(self, *label_values, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def dec(self, *label_values, amount: float = 1.0):
+        self.inc(*label_values, amount=-amount)
+
+    def render(self) -> list:
+        return self._render_values()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, *label_values, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                series = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        with self._lock:
+            items = [(key, (list(s[0]), s[1], s[2])) for key, s in self._values.items()]
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labels + ("le",), key + (le,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+def process_rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+class LoopLagMonitor:
+    """
+    Measures event loop lag: a greenlet sleeps for `interval` and records how
+    late it wakes up. Under gevent, a large value means something is blocking
+    the hub (CPU-bound work or un-patched I/O).
+    """
+
+    def __init__(self, gauge: Gauge, interval: float = 0.5):
+        self.gauge = gauge
+        self.interval = interval
+        self._running = False
+
+    def _run(self):
+        import gevent
+        while self._running:
+            start = time.perf_counter()
+            gevent.sleep(self.interval)
+            lag = time.perf_counter() - start - self.interval
+            self.gauge.set(value=max(lag, 0.0))
+
+    def start(self):
+        if self._running:
+            return
+        try:
+            import gevent
+        except ImportError:
+            return
+        self._running = True
+        gevent.spawn(self._run)
+
+    def stop(self):
+        self._running = False
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+        self.http_request_duration = self.histogram(
+            "devika_http_request_duration_seconds", "HTTP request latency by route.",
+            ("route", "method", "status"),
+        )
+        self.llm_request_duration = self.histogram(
+            "devika_llm_request_duration_seconds", "LLM call latency by model.",
+            ("provider", "model"),
+        )
+        self.llm_tokens = self.counter(
+            "devika_llm_tokens_total", "Tokens generated by model.", ("provider", "model"),
+        )
+        self.llm_tokens_per_second = self.gauge(
+            "devika_llm_tokens_per_second", "Generation speed of the last LLM call by model.",
+            ("provider", "model"),
+        )
+        self.llm_errors = self.counter(
+            "devika_llm_errors_total", "Failed LLM calls by model.", ("provider", "model"),
+        )
+        self.socket_connections = self.gauge(
+            "devika_socket_connections", "Connected Socket.IO clients.",
+        )
+        self.agent_threads = self.gauge(
+            "devika_active_agent_threads", "Running agent threads.",
+            callback=lambda: sum(1 for t in threading.enumerate() if t.name.startswith("agent:")),
+        )
+        self.queue_depth = self.gauge(
+            "devika_queue_depth", "Pending items per internal queue.", ("queue",),
+        )
+        self.process_rss = self.gauge(
+            "devika_process_resident_memory_bytes", "Resident set size of the server process.",
+            callback=process_rss_bytes,
+        )
+        self.loop_lag = self.gauge(
+            "devika_event_loop_lag_seconds", "How late the gevent hub woke a sleeping greenlet.",
+        )
+        self._queue_callbacks = {}
+        self.loop_lag_monitor = LoopLagMonitor(self.loop_lag)
+
+    def _register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labels=(), callback=None) -> Counter:
+        return self._register(Counter(name, documentation, labels, callback))
+
+    def gauge(self, name: str, documentation: str, labels=(), callback=None) -> Gauge:
+        return self._register(Gauge(name, documentation, labels, callback))
+
+    def histogram(self, name: str, documentation: str, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    # Instrumentation hooks
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float):
+        self.http_request_duration.observe(route, method, str(status), value=seconds)
+
+    def observe_llm(self, provider: str, model: str, seconds: float, tokens: int = 0):
+        self.llm_request_duration.observe(provider, model, value=seconds)
+        if tokens:
+            self.llm_tokens.inc(provider, model, amount=tokens)
+            if seconds > 0:
+                self.llm_tokens_per_second.set(provider, model, value=tokens / seconds)
+
+    def observe_llm_error(self, provider: str, model: str):
+        self.llm_errors.inc(provider, model)
+
+    def instrument_app(self, app):
+        """Time every Flask request, labelled by its URL rule rather than the raw path."""
+        from flask import g, request
+
+        @app.before_request
+        def start_request_timer():
+            g.request_start = time.perf_counter()
+
+        @app.after_request
+        def record_request_metrics(response):
+            start = g.get("request_start")
+            if start is not None:
+                route = request.url_rule.rule if request.url_rule else "unmatched"
+                self.observe_request(route, request.method, response.status_code, time.perf_counter() - start)
+            return response
+
+    def register_queue(self, name: str, depth_callback):
+        """Report `depth_callback()` as the depth of queue `name` on every scrape."""
+        self._queue_callbacks[name] = depth_callback
+
+    def render(self) -> str:
+        for name, callback in list(self._queue_callbacks.items()):
+            try:
+                self.queue_depth.set(name, value=callback())
+            except Exception:
+                pass
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,277 @@
+"""
+Per-run trace timeline and sampling profiler for agent executions.
+
+Every `Agent.execute` / `subsequent_execute` run is wrapped in `trace_run()`,
+and sub-agent steps open child spans with `span()`:
+
+    with span("researcher", tokens=len(prompt_tokens)) as s:
+        ...
+        s.set(cache_hit=True)
+
+`Agent` is not part of this tree and does not call `span()` yet, so a trace
+currently holds only the root span plus the `prefetch.*` spans and the `llm`
+spans from `ProviderHealth.guard` (once `LLM.inference` uses it).
+`Agent.execute` still has to wrap its planner, researcher, search, crawl,
+formatter and coder steps as above.
+
+The finished span tree is written to the project's `.devika/run-traces`
+directory and served by `/api/run-trace`. With `profile=True` a background
+thread samples the run's stack and stores folded stacks ("a;b;c 12") that
+flamegraph.pl or speedscope can render directly.
+
+The server runs under gevent, where "threads" are greenlets sharing one OS
+thread. The profiler therefore samples from a real OS thread (the unpatched
+`_thread` API) and only keeps samples taken while the run's greenlet is the
+one executing.
+"""
+
+import _thread
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+from src.project_paths import resolve_project_dir
+
+try:
+    from gevent import monkey
+    _start_os_thread = monkey.get_original("_thread", "start_new_thread")
+    _os_thread_id = monkey.get_original("_thread", "get_ident")
+    _os_lock = monkey.get_original("_thread", "allocate_lock")
+    _os_sleep = monkey.get_original("time", "sleep")
+except ImportError:
+    _start_os_thread, _os_thread_id, _os_lock = _thread.start_new_thread, _thread.get_ident, _thread.allocate_lock
+    _os_sleep = time.sleep
+
+try:
+    from greenlet import getcurrent as _current_greenlet
+except ImportError:
+    _current_greenlet = None
+
+
+TRACE_DIR = os.path.join(".devika", "run-traces")
+
+_local = threading.local()
+
+
+class Span:
+    def __init__(self, name: str, attributes: dict = None):
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.start = time.time()
+        self._perf_start = time.perf_counter()
+        self.duration = None
+        self.error = None
+        self.children = []
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, **counters):
+        """Accumulate numeric attributes, e.g. `add(tokens=120, cache_hits=1)`."""
+        for key, value in counters.items():
+            self.attributes[key] = self.attributes.get(key, 0) + value
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._perf_start
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "start": self.start,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+class SamplingProfiler:
+    """
+    Samples one OS thread's Python stack at a fixed interval.
+
+    With `greenlet` given, samples are only kept while that greenlet is
+    running, so the hub and other greenlets on the same thread are ignored.
+    """
+
+    def __init__(self, thread_id: int, greenlet=None, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.greenlet = greenlet
+        self.interval = interval
+        self.samples = Counter()
+        self._stopped = False
+        self._done = _os_lock()
+
+    def _active(self) -> bool:
+        # A greenlet's gr_frame is only set while it is switched out.
+        return self.greenlet is None or self.greenlet.gr_frame is None
+
+    def _run(self):
+        try:
+            while not self._stopped:
+                _os_sleep(self.interval)
+                if not self._active():
+                    continue
+                frame = sys._current_frames().get(self.thread_id)
+                if frame is None or not self._active():
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+        finally:
+            self._done.release()
+
+    def start(self):
+        self._done.acquire()
+        _start_os_thread(self._run, ())
+
+    def stop(self):
+        self._stopped = True
+        with self._done:
+            pass
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+
+class RunTrace:
+    def __init__(self, project_name: str, name: str, profile: bool = False):
+        self.run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.project_name = project_name
+        self.root = Span(name)
+        self.profiler = None
+        if profile:
+            greenlet = _current_greenlet() if _current_greenlet else None
+            self.profiler = SamplingProfiler(_os_thread_id(), greenlet)
+
+    def to_dict(self) -> dict:
+        return {
+            "run_id": self.run_id,
+            "project_name": self.project_name,
+            "profiled": self.profiler is not None,
+            "trace": self.root.to_dict(),
+        }
+
+
+def _trace_dir(project_name: str) -> str:
+    return os.path.join(resolve_project_dir(project_name), TRACE_DIR)
+
+
+def _save(run: RunTrace):
+    trace_dir = _trace_dir(run.project_name)
+    os.makedirs(trace_dir, exist_ok=True)
+    with open(os.path.join(trace_dir, f"{run.run_id}.json"), "w") as f:
+        json.dump(run.to_dict(), f)
+    if run.profiler is not None:
+        with open(os.path.join(trace_dir, f"{run.run_id}.folded"), "w") as f:
+            f.write(run.profiler.folded())
+
+
+def current_run():
+    return getattr(_local, "run", None)
+
+
+def current_span():
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else None
+
+
+@contextmanager
+def _bind(run, stack):
+    # The run is shared between threads; each thread keeps its own open-span stack.
+    previous = current_run(), getattr(_local, "stack", None)
+    _local.run, _local.stack = run, stack
+    try:
+        yield
+    finally:
+        _local.run, _local.stack = previous
+
+
+@contextmanager
+def trace_run(project_name: str, name: str = "agent.execute", profile: bool = False):
+    """Trace everything executed on this thread until the block exits, then persist it."""
+    run = RunTrace(project_name, name, profile)
+    if run.profiler:
+        run.profiler.start()
+    try:
+        with _bind(run, [run.root]):
+            yield run
+    except Exception as e:
+        run.root.error = str(e)
+        raise
+    finally:
+        run.root.finish()
+        if run.profiler:
+            run.profiler.stop()
+        try:
+            _save(run)
+        except (OSError, ValueError):
+            pass
+
+
+@contextmanager
+def attach(run: RunTrace, parent: Span = None):
+    """Continue `run` on another thread, nesting new spans under `parent`."""
+    if run is None:
+        yield None
+        return
+    with _bind(run, [parent or run.root]):
+        yield run
+
+
+class _NullSpan:
+    def set(self, **attributes):
+        pass
+
+    def add(self, **counters):
+        pass
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Record a child span of the current span; a no-op outside `trace_run()`."""
+    stack = getattr(_local, "stack", None)
+    if not stack:
+        yield _NullSpan()
+        return
+    child = Span(name, attributes)
+    stack[-1].children.append(child)
+    stack.append(child)
+    try:
+        yield child
+    except Exception as e:
+        child.error = str(e)
+        raise
+    finally:
+        child.finish()
+        stack.pop()
+
+
+def list_runs(project_name: str) -> list:
+    trace_dir = _trace_dir(project_name)
+    if not os.path.isdir(trace_dir):
+        return []
+    return sorted(f[:-5] for f in os.listdir(trace_dir) if f.endswith(".json"))
+
+
+def load_run(project_name: str, run_id: str = None, profile: bool = False):
+    """Return the stored trace (or folded profile) for `run_id`, default latest."""
+    runs = list_runs(project_name)
+    if run_id is None:
+        if not runs:
+            return None
+        run_id = runs[-1]
+    elif run_id not in runs:
+        return None
+    path = os.path.join(_trace_dir(project_name), f"{run_id}.{'folded' if profile else 'json'}")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return f.read() if profile else json.load(f)
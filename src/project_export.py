@@ -0,0 +1,213 @@
+"""
+Streaming project export with incremental snapshots.
+
+`stream_zip()` writes the archive into a small buffer that is drained after
+every chunk, so the HTTP response starts immediately and memory use does not
+grow with the project size.
+
+Each export records a snapshot manifest (`path -> sha256, size, mtime`) under
+the project's `.devika/snapshots`. Passing `since=<snapshot_id>` exports only
+files added or changed since that snapshot, plus a `.devika-deleted` entry
+listing removed paths. All hashing happens while the archive streams: a
+full export hashes each file as it is zipped, and an incremental one only
+hashes files whose size or mtime differ from the previous manifests, so
+unchanged files are not read at all.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+import unicodedata
+import uuid
+import zipfile
+from urllib.parse import quote
+
+from src.project_paths import resolve_project_dir
+
+
+SNAPSHOT_DIR = os.path.join(".devika", "snapshots")
+DELETED_ENTRY = ".devika-deleted"
+CHUNK_SIZE = 64 * 1024
+
+
+class SnapshotNotFound(Exception):
+    pass
+
+
+def content_disposition(filename: str) -> str:
+    """`Content-Disposition: attachment` value that survives spaces and non-ASCII names (RFC 6266)."""
+    fallback = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode("ascii")
+    fallback = fallback.replace("\\", "\\\\").replace('"', '\\"')
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+class _HashingReader:
+    """File opened for zipping that computes its sha256 as it is read."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self.digest = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._file.read(size)
+        self.digest.update(data)
+        return data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._file.close()
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for data in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+class _ChunkBuffer:
+    """Unseekable file object that zipfile writes into and we drain."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        if data:
+            self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self.chunks = self.chunks, []
+        return b"".join(chunks)
+
+
+def stream_zip(entries):
+    """
+    Yield a zip archive chunk by chunk.
+
+    `entries` is an iterable of `(arcname, path)` for files on disk,
+    `(arcname, file)` for an open binary file (closed after writing) or
+    `(arcname, bytes)` for in-memory content. It is consumed lazily, one
+    entry after the previous one has been written.
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for arcname, source in entries:
+            if isinstance(source, bytes):
+                archive.writestr(arcname, source)
+            else:
+                src = open(source, "rb") if isinstance(source, str) else source
+                with src, archive.open(arcname, "w", force_zip64=True) as dest:
+                    while True:
+                        data = src.read(CHUNK_SIZE)
+                        if not data:
+                            break
+                        dest.write(data)
+                        if buffer.chunks:
+                            yield buffer.drain()
+            if buffer.chunks:
+                yield buffer.drain()
+    yield buffer.drain()
+
+
+class ProjectExporter:
+    def project_path(self, project_name: str) -> str:
+        return resolve_project_dir(project_name)
+
+    def _snapshot_dir(self, project_name: str) -> str:
+        return os.path.join(self.project_path(project_name), SNAPSHOT_DIR)
+
+    def list_snapshots(self, project_name: str) -> list:
+        snapshot_dir = self._snapshot_dir(project_name)
+        if not os.path.isdir(snapshot_dir):
+            return []
+        return sorted(f[:-5] for f in os.listdir(snapshot_dir) if f.endswith(".json"))
+
+    def load_manifest(self, project_name: str, snapshot_id: str) -> dict:
+        if not re.fullmatch(r"[\w-]+", snapshot_id or "") or snapshot_id not in self.list_snapshots(project_name):
+            raise SnapshotNotFound(snapshot_id)
+        with open(os.path.join(self._snapshot_dir(project_name), f"{snapshot_id}.json")) as f:
+            return json.load(f)["files"]
+
+    def _save_manifest(self, project_name: str, snapshot_id: str, base: str, files: dict):
+        snapshot_dir = self._snapshot_dir(project_name)
+        os.makedirs(snapshot_dir, exist_ok=True)
+        tmp_path = os.path.join(snapshot_dir, f".{snapshot_id}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"snapshot_id": snapshot_id, "base": base, "created": time.time(), "files": files}, f)
+        os.replace(tmp_path, os.path.join(snapshot_dir, f"{snapshot_id}.json"))
+
+    @staticmethod
+    def _walk(root: str):
+        """Yield `(relpath, path, stat)` for every project file outside `.devika`."""
+        for dirpath, dirnames, filenames in os.walk(root):
+            if dirpath == root:
+                dirnames[:] = [d for d in dirnames if d != ".devika"]
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                yield os.path.relpath(path, root).replace(os.sep, "/"), path, os.stat(path)
+
+    def build_manifest(self, project_name: str, previous: dict = None) -> dict:
+        root = self.project_path(project_name)
+        previous = previous or {}
+        files = {}
+        for relpath, path, stat in self._walk(root):
+            cached = previous.get(relpath)
+            if cached and cached["size"] == stat.st_size and cached["mtime"] == stat.st_mtime_ns:
+                files[relpath] = cached
+                continue
+            files[relpath] = {"sha256": _hash_file(path), "size": stat.st_size, "mtime": stat.st_mtime_ns}
+        return files
+
+    def export(self, project_name: str, since: str = None):
+        """
+        Return `(snapshot_id, chunks)` for a full export, or an incremental one
+        when `since` is given. The snapshot is recorded once the stream has
+        been fully consumed, so an aborted download does not become a base.
+        Raises ValueError for project names outside PROJECTS_DIR.
+        """
+        root = self.project_path(project_name)
+        if not os.path.isdir(root):
+            raise FileNotFoundError(project_name)
+
+        base_files = self.load_manifest(project_name, since) if since else {}
+        cache = {}
+        if since:
+            latest = self.list_snapshots(project_name)
+            if latest and latest[-1] != since:
+                cache = self.load_manifest(project_name, latest[-1])
+            cache.update(base_files)
+        snapshot_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        files = {}
+
+        def entries():
+            for relpath, path, stat in self._walk(root):
+                entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+                if not since:
+                    reader = _HashingReader(path)
+                    yield relpath, reader
+                    files[relpath] = {"sha256": reader.digest.hexdigest(), **entry}
+                    continue
+                cached = cache.get(relpath)
+                if cached and cached["size"] == entry["size"] and cached["mtime"] == entry["mtime"]:
+                    files[relpath] = cached
+                else:
+                    files[relpath] = {"sha256": _hash_file(path), **entry}
+                if base_files.get(relpath, {}).get("sha256") != files[relpath]["sha256"]:
+                    yield relpath, path
+            if since:
+                yield DELETED_ENTRY, "\n".join(sorted(set(base_files) - set(files))).encode()
+
+        def chunks():
+            yield from stream_zip(entries())
+            self._save_manifest(project_name, snapshot_id, since, files)
+
+        return snapshot_id, chunks()
@@ -0,0 +1,27 @@
+"""
+Project directory lookup shared by the export, sandbox and tracing code.
+
+Project names come straight from API requests, so every path derived from one
+goes through `resolve_project_dir()`. It only returns directories that sit
+directly under `PROJECTS_DIR`.
+"""
+
+import os
+
+from src.config_store import get_config
+
+
+def resolve_project_dir(project_name: str) -> str:
+    """
+    Return the real path of `project_name`'s directory under PROJECTS_DIR.
+
+    Raises ValueError for names that would resolve anywhere else (`..`,
+    absolute paths, symlinks out of the projects directory).
+    """
+    if not project_name:
+        raise ValueError("project_name is required")
+    projects_dir = os.path.realpath(get_config().get_projects_dir())
+    path = os.path.realpath(os.path.join(projects_dir, project_name.lower().replace(" ", "-")))
+    if os.path.dirname(path) != projects_dir:
+        raise ValueError(f"Invalid project name: {project_name}")
+    return path
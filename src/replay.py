@@ -0,0 +1,364 @@
+"""
+Record/replay of an agent run's external I/O.
+
+`record()` patches the LLM, search and browser entry points. It logs every
+call and its result to a JSON fixture while the real run proceeds. `replay()`
+patches the same entry points to return the recorded results instantly and in
+order, without touching the network, a GPU or Playwright. A replayed
+`Agent.execute` or `PipelineRunner.run_pipeline` then measures only
+orchestration overhead, and is deterministic enough for regression checks.
+
+    with record("fixtures/todo_app.json"):
+        agent.execute(prompt, project_name)
+
+    with replay("fixtures/todo_app.json") as session:
+        agent.execute(prompt, project_name)
+    print(session.stats())
+
+Only the outermost patched call is recorded: `LLM.inference` calls
+`LLMConnector.send_request` internally, and replaying `inference` never
+reaches the connector, so recording both would leave unused entries.
+"""
+
+import abc
+import asyncio
+import base64
+import contextvars
+import functools
+import hashlib
+import importlib
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+
+DEFAULT_TARGETS = (
+    "llm_connector.llm_connector.LLMConnector.send_request",
+    "src.llm.llm.LLM.inference",
+    "src.browser.search.BingSearch.search",
+    "src.browser.search.BingSearch.get_first_link",
+    "src.browser.search.GoogleSearch.search",
+    "src.browser.search.GoogleSearch.get_first_link",
+    "src.browser.search.DuckDuckGoSearch.search",
+    "src.browser.search.DuckDuckGoSearch.get_first_link",
+    "src.browser.browser.Browser.start",
+    "src.browser.browser.Browser.go_to",
+    "src.browser.browser.Browser.screenshot",
+    "src.browser.browser.Browser.extract_text",
+    "src.browser.browser.Browser.get_markdown",
+    "src.browser.browser.Browser.close",
+)
+
+SELF = "__self__"
+BYTES = "__bytes__"
+TUPLE = "__tuple__"
+
+# Set while a recorded call is running, per thread and per asyncio task.
+_in_call = contextvars.ContextVar("replay_in_call", default=False)
+
+
+class ReplayMissError(Exception):
+    """Raised when a replayed run makes a call the fixture has no result for."""
+
+
+class UnrecordableResultError(TypeError):
+    """Raised while recording when a result cannot be stored in the fixture."""
+
+
+def _resolve(target: str):
+    module_path, _, attr = target.rpartition(".")
+    owner = None
+    while module_path:
+        try:
+            owner = importlib.import_module(module_path)
+            break
+        except ImportError:
+            module_path, _, parent = module_path.rpartition(".")
+            attr = f"{parent}.{attr}"
+    if owner is None:
+        return None
+    *parents, name = attr.split(".")
+    for parent in parents:
+        owner = getattr(owner, parent, None)
+        if owner is None:
+            return None
+    if not hasattr(owner, name):
+        return None
+    return owner, name
+
+
+def _stable(value):
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_stable(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _stable(v) for k, v in value.items()}
+    return f"<{type(value).__name__}>"
+
+
+def call_key(target: str, args, kwargs, bound: bool) -> str:
+    args = args[1:] if bound else args
+    payload = json.dumps([target, _stable(list(args)), _stable(kwargs)], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _encode(value):
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        return {BYTES: base64.b64encode(value).decode("ascii")}
+    if isinstance(value, tuple):
+        return {TUPLE: [_encode(v) for v in value]}
+    if isinstance(value, list):
+        return [_encode(v) for v in value]
+    if isinstance(value, dict) and all(isinstance(k, str) for k in value):
+        return {k: _encode(v) for k, v in value.items()}
+    raise UnrecordableResultError(f"cannot record a {type(value).__name__} result")
+
+
+def _decode(value):
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if isinstance(value, dict):
+        if set(value) == {BYTES}:
+            return base64.b64decode(value[BYTES])
+        if set(value) == {TUPLE}:
+            return tuple(_decode(v) for v in value[TUPLE])
+        return {k: _decode(v) for k, v in value.items()}
+    return value
+
+
+def _encode_result(result, instance):
+    if instance is not None and result is instance:
+        return SELF
+    return _encode(result)
+
+
+def _decode_result(result, instance):
+    if result == SELF:
+        return instance
+    return _decode(result)
+
+
+def _exception_type(error: BaseException) -> str:
+    cls = type(error)
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _rebuild_exception(call) -> BaseException:
+    """Recreate a recorded exception as its original type, or RuntimeError if unavailable."""
+    message = call.get("message", call["error"])
+    try:
+        module_name, _, qualname = call.get("error_type", "").partition(":")
+        cls = importlib.import_module(module_name)
+        for part in qualname.split("."):
+            cls = getattr(cls, part)
+        if isinstance(cls, type) and issubclass(cls, Exception):
+            try:
+                return cls(message)
+            except Exception:
+                error = cls.__new__(cls)
+                error.args = (message,)
+                return error
+    except (ImportError, AttributeError, ValueError):
+        pass
+    return RuntimeError(f"replayed error: {call['error']}")
+
+
+class _Session(abc.ABC):
+    def __init__(self, targets):
+        self.targets = targets
+        self._patched = []
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def _wrap(self, target, original, bound):
+        """Return the function installed in place of `original`."""
+
+    def install(self):
+        for target in self.targets:
+            resolved = _resolve(target)
+            if resolved is None:
+                continue
+            owner, name = resolved
+            raw = owner.__dict__.get(name) if isinstance(owner, type) else None
+            if isinstance(raw, (staticmethod, classmethod)):
+                wrapper = self._wrap(target, raw.__func__, isinstance(raw, classmethod))
+                patched = type(raw)(wrapper)
+            else:
+                patched = self._wrap(target, getattr(owner, name), isinstance(owner, type))
+            self._patched.append((owner, name, owner.__dict__.get(name), name in owner.__dict__))
+            setattr(owner, name, patched)
+
+    def uninstall(self):
+        for owner, name, original, owned in reversed(self._patched):
+            if owned:
+                setattr(owner, name, original)
+            else:
+                delattr(owner, name)
+        self._patched = []
+
+    @staticmethod
+    def _instance(args, bound):
+        return args[0] if bound and args else None
+
+
+class Recorder(_Session):
+    def __init__(self, targets=DEFAULT_TARGETS):
+        super().__init__(targets)
+        self.calls = []
+        self.unrecordable = []
+        self.started = time.time()
+
+    def _log(self, target, key, instance, result, error, seconds):
+        entry = {"target": target, "key": key, "seconds": seconds}
+        if error is not None:
+            entry["error"] = f"{type(error).__name__}: {error}"
+            entry["error_type"] = _exception_type(error)
+            entry["message"] = str(error)
+        else:
+            try:
+                entry["result"] = _encode_result(result, instance)
+            except UnrecordableResultError as e:
+                # Kept so the CLI can fail even if the agent swallows the error.
+                with self._lock:
+                    self.unrecordable.append(f"{target}: {e}")
+                raise UnrecordableResultError(f"{target}: {e}") from None
+        with self._lock:
+            self.calls.append(entry)
+
+    def _wrap(self, target, original, bound):
+        if asyncio.iscoroutinefunction(original):
+            @functools.wraps(original)
+            async def async_wrapper(*args, **kwargs):
+                if _in_call.get():
+                    return await original(*args, **kwargs)
+                key = call_key(target, args, kwargs, bound)
+                start = time.perf_counter()
+                token = _in_call.set(True)
+                try:
+                    result = await original(*args, **kwargs)
+                except Exception as e:
+                    self._log(target, key, None, None, e, time.perf_counter() - start)
+                    raise
+                finally:
+                    _in_call.reset(token)
+                self._log(target, key, self._instance(args, bound), result, None, time.perf_counter() - start)
+                return result
+            return async_wrapper
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            if _in_call.get():
+                return original(*args, **kwargs)
+            key = call_key(target, args, kwargs, bound)
+            start = time.perf_counter()
+            token = _in_call.set(True)
+            try:
+                result = original(*args, **kwargs)
+            except Exception as e:
+                self._log(target, key, None, None, e, time.perf_counter() - start)
+                raise
+            finally:
+                _in_call.reset(token)
+            self._log(target, key, self._instance(args, bound), result, None, time.perf_counter() - start)
+            return result
+        return wrapper
+
+    def save(self, path: str, metadata: dict = None):
+        with open(path, "w") as f:
+            json.dump({
+                "version": 2,
+                "metadata": metadata or {},
+                "wall_seconds": time.time() - self.started,
+                "calls": self.calls,
+            }, f, indent=1)
+
+
+class Replayer(_Session):
+    def __init__(self, fixture: dict, targets=DEFAULT_TARGETS, strict: bool = True):
+        super().__init__(targets)
+        self.fixture = fixture
+        self.strict = strict
+        self._queues = defaultdict(deque)
+        self._by_target = defaultdict(deque)
+        for call in fixture["calls"]:
+            self._queues[call["key"]].append(call)
+            self._by_target[call["target"]].append(call)
+        self.replayed = 0
+        self.fuzzy = 0
+        self.misses = 0
+
+    def _next(self, target, key):
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue:
+                call = queue.popleft()
+                self._by_target[target].remove(call)
+                self.replayed += 1
+                return call
+            if not self.strict and self._by_target[target]:
+                # Prompts that embed timestamps or paths differ between runs;
+                # fall back to the next recorded call of the same target.
+                call = self._by_target[target].popleft()
+                self._queues[call["key"]].remove(call)
+                self.fuzzy += 1
+                return call
+            self.misses += 1
+        raise ReplayMissError(f"No recorded result for {target} (key {key})")
+
+    def _respond(self, call, instance):
+        if "error" in call:
+            raise _rebuild_exception(call)
+        return _decode_result(call.get("result"), instance)
+
+    def _wrap(self, target, original, bound):
+        if asyncio.iscoroutinefunction(original):
+            @functools.wraps(original)
+            async def async_wrapper(*args, **kwargs):
+                call = self._next(target, call_key(target, args, kwargs, bound))
+                return self._respond(call, self._instance(args, bound))
+            return async_wrapper
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            call = self._next(target, call_key(target, args, kwargs, bound))
+            return self._respond(call, self._instance(args, bound))
+        return wrapper
+
+    def stats(self) -> dict:
+        recorded_io = sum(call["seconds"] for call in self.fixture["calls"])
+        return {
+            "recorded_calls": len(self.fixture["calls"]),
+            "replayed": self.replayed,
+            "fuzzy_matches": self.fuzzy,
+            "misses": self.misses,
+            "recorded_wall_seconds": self.fixture.get("wall_seconds"),
+            "recorded_io_seconds": recorded_io,
+        }
+
+
+@contextmanager
+def record(path: str, targets=DEFAULT_TARGETS, metadata: dict = None):
+    recorder = Recorder(targets)
+    recorder.install()
+    try:
+        yield recorder
+    finally:
+        recorder.uninstall()
+        recorder.save(path, metadata)
+
+
+@contextmanager
+def replay(path: str, targets=DEFAULT_TARGETS, strict: bool = True):
+    with open(path) as f:
+        fixture = json.load(f)
+    replayer = Replayer(fixture, targets, strict)
+    replayer.install()
+    try:
+        yield replayer
+    finally:
+        replayer.uninstall()
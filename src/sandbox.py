@@ -0,0 +1,238 @@
+"""
+Code execution service backed by a pool of pre-forked, resource-limited
+Python worker processes.
+
+Each worker is a fresh interpreter that has already started up and imported
+the standard library modules it needs. It then blocks on stdin waiting for a
+job. A job runs user code in the project's working directory under
+`PROJECTS_DIR`, with CPU-time, address-space and file-size rlimits applied at
+spawn. Wall-clock time is enforced by the parent for the whole process
+group: when the worker exits or times out the group is killed, and output
+from children that escaped it (e.g. via `setsid`) is only read until the
+deadline. Workers are single use:
+after a job the process exits and a replacement is spawned in the background,
+so no state leaks between runs while short scripts still skip interpreter
+startup.
+"""
+
+import codecs
+import json
+import os
+import select
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+from src.project_paths import resolve_project_dir
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, only the wall-clock timeout applies
+    resource = None
+
+
+READER_GRACE = 0.5
+
+WORKER_SOURCE = r"""
+import json, os, sys, traceback
+job = json.loads(sys.stdin.readline())
+sys.stdin = open(os.devnull)
+os.chdir(job["cwd"])
+sys.path.insert(0, job["cwd"])
+sys.argv = [job["filename"]]
+try:
+    exec(compile(job["code"], job["filename"], "exec"), {"__name__": "__main__", "__file__": job["filename"]})
+except SystemExit as e:
+    sys.exit(e.code)
+except BaseException:
+    traceback.print_exc()
+    sys.exit(1)
+"""
+
+
+class SandboxLimits:
+    def __init__(self, cpu_seconds: int = 30, memory_mb: int = 512,
+                 wall_seconds: float = 60.0, max_output_bytes: int = 1024 * 1024,
+                 max_file_mb: int = 64):
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.wall_seconds = wall_seconds
+        self.max_output_bytes = max_output_bytes
+        self.max_file_mb = max_file_mb
+
+
+class ExecutionResult:
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.returncode = None
+        self.timed_out = False
+        self.truncated = False
+        self.duration = None
+
+    def to_dict(self) -> dict:
+        return {
+            "run_id": self.run_id,
+            "returncode": self.returncode,
+            "timed_out": self.timed_out,
+            "truncated": self.truncated,
+            "duration": self.duration,
+        }
+
+
+class SandboxPool:
+    def __init__(self, size: int = 2, max_concurrent: int = 4, limits: SandboxLimits = None):
+        self.size = size
+        self.limits = limits or SandboxLimits()
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    def _apply_limits(self):
+        os.setsid()
+        if resource is None:
+            return
+        limits = self.limits
+        resource.setrlimit(resource.RLIMIT_CPU, (limits.cpu_seconds, limits.cpu_seconds + 1))
+        memory = limits.memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+        file_size = limits.max_file_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_FSIZE, (file_size, file_size))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+    def _spawn(self) -> subprocess.Popen:
+        return subprocess.Popen(
+            [sys.executable, "-u", "-I", "-c", WORKER_SOURCE],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            preexec_fn=self._apply_limits if os.name == "posix" else None,
+            env={"PATH": os.environ.get("PATH", ""), "PYTHONIOENCODING": "utf-8"},
+        )
+
+    def _refill(self):
+        # Several refills can run at once (one per _acquire), so the pool size
+        # is re-checked before every spawn and before keeping the new worker.
+        while True:
+            with self._lock:
+                if len(self._idle) >= self.size:
+                    return
+            worker = self._spawn()
+            with self._lock:
+                if len(self._idle) < self.size:
+                    self._idle.append(worker)
+                    continue
+            self._kill(worker)
+            worker.wait()
+            return
+
+    def start(self):
+        threading.Thread(target=self._refill, name="sandbox-refill", daemon=True).start()
+
+    def _acquire(self) -> subprocess.Popen:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.poll() is None:
+                    break
+            else:
+                worker = None
+        threading.Thread(target=self._refill, name="sandbox-refill", daemon=True).start()
+        return worker or self._spawn()
+
+    def project_dir(self, project_name: str) -> str:
+        path = resolve_project_dir(project_name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def run(self, project_name: str, code: str, on_output=None, filename: str = "main.py") -> ExecutionResult:
+        """
+        Run `code` for `project_name` and block until it finishes.
+
+        `on_output(stream, text)` is called from reader threads for every chunk
+        of stdout/stderr as it arrives.
+        """
+        result = ExecutionResult(uuid.uuid4().hex[:12])
+        cwd = self.project_dir(project_name)
+        with self._slots:
+            worker = self._acquire()
+            start = time.monotonic()
+            job = {"code": code, "cwd": cwd, "filename": filename}
+            try:
+                worker.stdin.write((json.dumps(job) + "\n").encode())
+                worker.stdin.close()
+            except BrokenPipeError:
+                pass
+
+            budget = [self.limits.max_output_bytes]
+            budget_lock = threading.Lock()
+            stop = threading.Event()
+
+            def pump(pipe, stream):
+                decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+                while not stop.is_set():
+                    if os.name == "posix" and not select.select([pipe], [], [], 0.1)[0]:
+                        continue
+                    chunk = pipe.read1(4096)
+                    if not chunk:
+                        break
+                    with budget_lock:
+                        if budget[0] <= 0:
+                            result.truncated = True
+                            continue
+                        if len(chunk) > budget[0]:
+                            result.truncated = True
+                            chunk = chunk[:budget[0]]
+                        budget[0] -= len(chunk)
+                    text = decoder.decode(chunk)
+                    if on_output and text:
+                        on_output(stream, text)
+
+            readers = [
+                threading.Thread(target=pump, args=(worker.stdout, "stdout"), daemon=True),
+                threading.Thread(target=pump, args=(worker.stderr, "stderr"), daemon=True),
+            ]
+            for reader in readers:
+                reader.start()
+
+            deadline = start + self.limits.wall_seconds
+            try:
+                worker.wait(timeout=self.limits.wall_seconds)
+            except subprocess.TimeoutExpired:
+                result.timed_out = True
+            # Background children in the worker's group would otherwise keep
+            # the pipes open and outlive the run.
+            self._kill(worker)
+            worker.wait()
+            for reader in readers:
+                reader.join(max(deadline - time.monotonic(), READER_GRACE))
+            if any(reader.is_alive() for reader in readers):
+                # A child left the group and still holds stdout/stderr.
+                result.timed_out = True
+                stop.set()
+                for reader in readers:
+                    reader.join()
+            worker.stdout.close()
+            worker.stderr.close()
+
+            result.returncode = worker.returncode
+            result.duration = time.monotonic() - start
+        return result
+
+    @staticmethod
+    def _kill(worker: subprocess.Popen):
+        try:
+            if os.name == "posix":
+                os.killpg(worker.pid, 9)
+            else:
+                worker.kill()
+        except ProcessLookupError:
+            pass
+
+    def shutdown(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            self._kill(worker)
+            worker.wait()
@@ -0,0 +1,242 @@
+"""
+Batched, backpressured Socket.IO emits for agent events.
+
+`emit_agent` sends one websocket frame per call to every client. With
+streaming output that floods slow clients and the gevent loop.
+`EmitBatcher.emit()` has the same signature, but it only appends the event to
+a bounded per-client buffer. A background task flushes each buffer every
+`window` seconds:
+
+- state-like channels (`MERGE_CHANNELS`) keep only the latest event per
+  project, because each one supersedes the previous one. On `inference`
+  only the elapsed-time ticks (`type == "time"`) are merged, and list
+  payloads are only merged when they name their project;
+- consecutive `code-output` chunks for the same stream are concatenated;
+- when a buffer is full, the oldest log-like event is discarded and counted.
+  The latest state update per channel is only dropped if nothing else can be,
+  and terminal events such as `code-exit` only when the buffer holds nothing
+  else, so a buffer never grows past `capacity`;
+- at most `max_events_per_flush` events are sent to a client per window.
+
+Clients that send `batch-events` with `{"enabled": true}` get each window as
+one `batch` event (`[[channel, data], ...]`) and must acknowledge it. Only one
+batch is in flight per client: nothing more is sent until the ack arrives (or
+`ack_timeout` passes), so a slow client only builds up its own bounded, merged
+buffer. Other clients get the merged events one by one, paced by the window,
+so existing listeners keep working.
+"""
+
+import functools
+import threading
+import time
+from collections import deque
+
+
+MERGE_CHANNELS = {"agent-state", "tokens", "screenshot", "inference"}
+CONCAT_CHANNELS = {"code-output"}
+UNDROPPABLE_CHANNELS = {"code-exit", "socket_response"}
+BROADCAST = "*"
+
+
+class _ClientBuffer:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.events = deque()
+        self.batch = False
+        self.in_flight = None
+
+    def _merge_key(self, channel, data):
+        if channel not in MERGE_CHANNELS:
+            return None
+        if isinstance(data, list):
+            # A whole state stack: only merge when it names its project.
+            last = data[-1] if data else None
+            project = last.get("project_name") if isinstance(last, dict) else None
+            return (channel, project) if project is not None else None
+        if not isinstance(data, dict):
+            return None
+        if channel == "inference":
+            # Only elapsed-time ticks supersede each other; warnings and
+            # errors on this channel must all be delivered.
+            if data.get("type") != "time":
+                return None
+            return channel, data.get("project_name"), "time"
+        return channel, data.get("project_name")
+
+    def push(self, channel, data) -> tuple:
+        """Append an event; return (merged, dropped) counts."""
+        key = self._merge_key(channel, data)
+        if key is not None:
+            for i, (c, d, k) in enumerate(self.events):
+                if k == key:
+                    del self.events[i]
+                    self.events.append((channel, data, key))
+                    return 1, 0
+        if channel in CONCAT_CHANNELS and self.events:
+            last_channel, last_data, _ = self.events[-1]
+            if (last_channel == channel and isinstance(data, dict) and isinstance(last_data, dict)
+                    and last_data.get("stream") == data.get("stream")
+                    and last_data.get("project_name") == data.get("project_name")):
+                self.events[-1] = (channel, {**last_data, "data": last_data["data"] + data["data"]}, None)
+                return 1, 0
+
+        dropped = 0
+        if len(self.events) >= self.capacity:
+            victim = self._victim()
+            if victim is None and channel not in UNDROPPABLE_CHANNELS:
+                return 0, 1
+            del self.events[0 if victim is None else victim]
+            dropped = 1
+        self.events.append((channel, data, key))
+        return 0, dropped
+
+    def _victim(self):
+        fallback = None
+        for i, (channel, _, key) in enumerate(self.events):
+            if channel in UNDROPPABLE_CHANNELS:
+                continue
+            if key is None:
+                return i
+            if fallback is None:
+                fallback = i
+        return fallback
+
+    def take(self, limit: int) -> list:
+        taken = []
+        while self.events and len(taken) < limit:
+            channel, data, _ = self.events.popleft()
+            taken.append((channel, data))
+        return taken
+
+
+class EmitBatcher:
+    def __init__(self, socketio, logger=None, window: float = 0.05,
+                 capacity: int = 256, max_events_per_flush: int = 64,
+                 relay_remote: bool = False, ack_timeout: float = 5.0):
+        """
+        With `relay_remote=True` (multi-process mode) events are also
+        coalesced into a broadcast buffer and sent to clients connected to
+        other processes, skipping the local ones that get their own buffers.
+        Broadcasts cannot be acknowledged and are paced by the window only.
+        """
+        self.socketio = socketio
+        self.logger = logger
+        self.window = window
+        self.capacity = capacity
+        self.max_events_per_flush = max_events_per_flush
+        self.relay_remote = relay_remote
+        self.ack_timeout = ack_timeout
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._running = False
+        self.emitted = 0
+        self.frames = 0
+        self.merged = 0
+        self.dropped = 0
+        self.ack_timeouts = 0
+
+    def connect(self, sid: str):
+        with self._lock:
+            self._clients.setdefault(sid, _ClientBuffer(self.capacity))
+
+    def disconnect(self, sid: str):
+        with self._lock:
+            self._clients.pop(sid, None)
+
+    def set_batching(self, sid: str, enabled: bool):
+        with self._lock:
+            client = self._clients.setdefault(sid, _ClientBuffer(self.capacity))
+            client.batch = enabled
+
+    def emit(self, channel: str, content, log: bool = True) -> bool:
+        """Drop-in replacement for `emit_agent(channel, content, log)`."""
+        with self._lock:
+            targets = list(self._clients.values())
+            if self.relay_remote:
+                targets.append(self._clients.setdefault(BROADCAST, _ClientBuffer(self.capacity)))
+            for client in targets:
+                merged, dropped = client.push(channel, content)
+                self.merged += merged
+                self.dropped += dropped
+        if log and self.logger:
+            self.logger.info(f"SOCKET {channel} MESSAGE: {content}")
+        return True
+
+    def _send(self, sid, client, events, local):
+        if sid == BROADCAST:
+            kwargs = {"skip_sid": local} if local else {}
+        else:
+            # The client is connected to this process: bypass the
+            # multi-process bus, only the broadcast relay goes through it.
+            kwargs = {"to": sid, "ignore_queue": True}
+        if client.batch:
+            if sid != BROADCAST:
+                kwargs["callback"] = functools.partial(self._acked, client)
+            self.socketio.emit("batch", [[channel, data] for channel, data in events], **kwargs)
+            self.frames += 1
+        else:
+            for channel, data in events:
+                self.socketio.emit(channel, data, **kwargs)
+            self.frames += len(events)
+        self.emitted += len(events)
+
+    def _acked(self, client, *args):
+        with self._lock:
+            client.in_flight = None
+
+    def flush(self):
+        now = time.monotonic()
+        with self._lock:
+            local = [sid for sid in self._clients if sid != BROADCAST]
+            pending = []
+            for sid, client in self._clients.items():
+                if client.in_flight is not None:
+                    if now - client.in_flight < self.ack_timeout:
+                        continue
+                    client.in_flight = None
+                    self.ack_timeouts += 1
+                events = client.take(self.max_events_per_flush)
+                if not events:
+                    continue
+                if client.batch and sid != BROADCAST:
+                    client.in_flight = now
+                pending.append((sid, client, events))
+        for sid, client, events in pending:
+            try:
+                self._send(sid, client, events, local)
+            except Exception as e:
+                with self._lock:
+                    client.in_flight = None
+                if self.logger:
+                    self.logger.error(f"SOCKET batch to {sid} ERROR: {str(e)}")
+
+    def _run(self):
+        while self._running:
+            self.socketio.sleep(self.window)
+            self.flush()
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self.socketio.start_background_task(self._run)
+
+    def stop(self):
+        self._running = False
+        self.flush()
+
+    def buffered(self) -> int:
+        with self._lock:
+            return sum(len(client.events) for client in self._clients.values())
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self._clients),
+            "buffered": self.buffered(),
+            "in_flight": sum(client.in_flight is not None for client in list(self._clients.values())),
+            "ack_timeouts": self.ack_timeouts,
+            "emitted": self.emitted,
+            "frames": self.frames,
+            "merged": self.merged,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+from src.llm.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitOpenError, ProviderHealth,
+)
+
+
+class _Timeout(BaseException):
+    """Stands in for gevent.Timeout, which is not an Exception subclass."""
+
+
+def fail(health, exc=IOError("down")):
+    with pytest.raises(type(exc)):
+        with health.guard("ollama", "phi"):
+            raise exc
+
+
+def test_opens_after_consecutive_failures():
+    health = ProviderHealth(failure_threshold=2, recovery_time=60)
+    fail(health)
+    assert health.breaker("ollama", "phi").state == CLOSED
+    fail(health)
+    assert health.breaker("ollama", "phi").state == OPEN
+    with pytest.raises(CircuitOpenError):
+        with health.guard("ollama", "phi"):
+            pass
+
+
+def test_success_resets_failure_count():
+    health = ProviderHealth(failure_threshold=2)
+    fail(health)
+    with health.guard("ollama", "phi"):
+        pass
+    fail(health)
+    assert health.breaker("ollama", "phi").state == CLOSED
+
+
+def test_half_open_admits_single_probe():
+    health = ProviderHealth(failure_threshold=1, recovery_time=0.01)
+    fail(health)
+    time.sleep(0.02)
+    breaker = health.breaker("ollama", "phi")
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow_request()
+
+
+def test_failed_probe_reopens_and_successful_probe_closes():
+    health = ProviderHealth(failure_threshold=1, recovery_time=0.01)
+    fail(health)
+    time.sleep(0.02)
+    fail(health)
+    assert health.breaker("ollama", "phi").state == OPEN
+    time.sleep(0.02)
+    with health.guard("ollama", "phi"):
+        pass
+    assert health.breaker("ollama", "phi").state == CLOSED
+
+
+def test_base_exception_in_probe_releases_it():
+    health = ProviderHealth(failure_threshold=1, recovery_time=0.01)
+    fail(health)
+    time.sleep(0.02)
+    fail(health, _Timeout())
+    breaker = health.breaker("ollama", "phi")
+    assert not breaker.probe_in_flight
+    time.sleep(0.02)
+    with health.guard("ollama", "phi"):
+        pass
+    assert breaker.state == CLOSED
+
+
+def test_timeout_uses_max_until_enough_samples():
+    health = ProviderHealth(max_timeout=60)
+    assert health.timeout_for("ollama", "phi", 500) == 60
+    breaker = health.breaker("ollama", "phi")
+    for _ in range(ProviderHealth.MIN_SAMPLES):
+        breaker.record_success(1.0, tokens=100)
+    # p95 of 0.01 s/token * 500 tokens * headroom 3 = 15 s
+    assert health.timeout_for("ollama", "phi", 500) == pytest.approx(15.0)
+
+
+def test_timeout_is_clamped():
+    health = ProviderHealth(max_timeout=60)
+    breaker = health.breaker("ollama", "phi")
+    for _ in range(ProviderHealth.MIN_SAMPLES):
+        breaker.record_success(1.0, tokens=100)
+    assert health.timeout_for("ollama", "phi", 1) == ProviderHealth.MIN_TIMEOUT
+    assert health.timeout_for("ollama", "phi", 100000) == 60
+
+
+def test_provider_names_are_case_insensitive():
+    health = ProviderHealth()
+    assert health.breaker("ollama", "phi") is health.breaker("OLLAMA", "phi")
@@ -0,0 +1,88 @@
+import os
+import time
+
+import pytest
+
+from src.config_store import ConfigStore
+
+
+SAMPLE = """
+[STORAGE]
+PROJECTS_DIR = "data/projects"
+
+[TIMEOUT]
+INFERENCE = 60
+
+[LOGGING]
+LOG_PROMPTS = "false"
+"""
+
+
+@pytest.fixture
+def store(tmp_path):
+    (tmp_path / "sample.config.toml").write_text(SAMPLE)
+    (tmp_path / "config.toml").write_text('[TIMEOUT]\nINFERENCE = 30\n')
+    return ConfigStore(path=str(tmp_path / "config.toml"),
+                       sample_path=str(tmp_path / "sample.config.toml"),
+                       poll_interval=0.01)
+
+
+def _touch(path, content):
+    stat = os.stat(path)
+    with open(path, "w") as f:
+        f.write(content)
+    # Make sure the stamp changes even on filesystems with coarse mtimes.
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_config_overrides_sample(store):
+    snapshot = store._snapshot
+    assert snapshot.get_timeout_inference() == 30.0
+    assert snapshot.get_projects_dir() == "data/projects"
+    assert snapshot.get_logging_prompts() is False
+    assert snapshot.version == 1
+
+
+def test_snapshot_is_immutable(store):
+    snapshot = store._snapshot
+    with pytest.raises(TypeError):
+        snapshot._data["TIMEOUT"]["INFERENCE"] = 1
+    copy = snapshot.as_dict()
+    copy["TIMEOUT"]["INFERENCE"] = 1
+    assert snapshot.get_timeout_inference() == 30.0
+
+
+def test_reload_swaps_snapshot_only_when_file_changes(store):
+    old = store._snapshot
+    assert store.reload() is False
+    _touch(store.path, '[TIMEOUT]\nINFERENCE = 45\n')
+    assert store.reload() is True
+    assert store._snapshot.get_timeout_inference() == 45.0
+    assert store._snapshot.version == old.version + 1
+    assert old.get_timeout_inference() == 30.0
+
+
+def test_broken_file_keeps_previous_snapshot(store):
+    old = store._snapshot
+    _touch(store.path, "[TIMEOUT\nINFERENCE = ")
+    assert store.reload() is False
+    assert store._snapshot is old
+
+
+def test_update_merges_and_notifies_subscribers(store):
+    seen = []
+    store.subscribe(seen.append)
+    snapshot = store.update({"API_KEYS": {"OPENAI": "sk-test"}})
+    assert snapshot.get_openai_api_key() == "sk-test"
+    assert snapshot.get_timeout_inference() == 30.0
+    assert [s.version for s in seen] == [1, 2]
+    assert not [f for f in os.listdir(os.path.dirname(store.path)) if f.endswith(".tmp")]
+
+
+def test_watcher_picks_up_external_edits(store):
+    assert store.snapshot().get_timeout_inference() == 30.0
+    _touch(store.path, '[TIMEOUT]\nINFERENCE = 90\n')
+    deadline = time.monotonic() + 2
+    while store.snapshot().get_timeout_inference() != 90.0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.snapshot().get_timeout_inference() == 90.0
@@ -0,0 +1,60 @@
+import sqlite3
+import time
+
+import pytest
+
+pytest.importorskip("socketio")
+
+from src.message_bus import SQLiteManager  # noqa: E402
+
+
+class _Server:
+    def __init__(self, on_sleep):
+        self.on_sleep = on_sleep
+
+    def sleep(self, seconds):
+        self.on_sleep()
+
+
+def _rows(path):
+    connection = sqlite3.connect(path)
+    try:
+        return [row[0] for row in connection.execute("SELECT payload FROM socketio_bus ORDER BY id")]
+    finally:
+        connection.close()
+
+
+def test_listener_starts_after_existing_messages(tmp_path):
+    path = str(tmp_path / "bus.db")
+    publisher = SQLiteManager(path)
+    listener = SQLiteManager(path)
+    publisher._publish({"method": "emit", "event": "before"})
+
+    listener.server = _Server(lambda: publisher._publish({"method": "emit", "event": "after"}))
+    messages = listener._listen()
+    assert next(messages) == {"method": "emit", "event": "after"}
+
+
+def test_channels_are_isolated(tmp_path):
+    path = str(tmp_path / "bus.db")
+    other = SQLiteManager(path, channel="other")
+    publisher = SQLiteManager(path)
+    listener = SQLiteManager(path)
+
+    def publish():
+        other._publish({"event": "elsewhere"})
+        publisher._publish({"event": "here"})
+
+    listener.server = _Server(publish)
+    assert next(listener._listen()) == {"event": "here"}
+
+
+def test_old_messages_are_pruned_after_retention(tmp_path):
+    path = str(tmp_path / "bus.db")
+    publisher = SQLiteManager(path, retention=0.05)
+    publisher._publish({"event": "first"})
+    publisher._publish({"event": "second"})
+    assert len(_rows(path)) == 2
+    time.sleep(0.1)
+    publisher._publish({"event": "third"})
+    assert _rows(path) == ['{"event": "third"}']
@@ -0,0 +1,83 @@
+import pytest
+
+from src.monitoring.metrics import MetricsRegistry
+
+
+def _lines(registry, prefix):
+    return [line for line in registry.render().splitlines() if line.startswith(prefix)]
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("test_latency_seconds", "Test latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe("/api", value=value)
+    assert _lines(registry, "test_latency_seconds") == [
+        'test_latency_seconds_bucket{route="/api",le="0.1"} 2',
+        'test_latency_seconds_bucket{route="/api",le="1.0"} 3',
+        'test_latency_seconds_bucket{route="/api",le="+Inf"} 4',
+        'test_latency_seconds_sum{route="/api"} 3.65',
+        'test_latency_seconds_count{route="/api"} 4',
+    ]
+
+
+def test_headers_and_label_escaping():
+    registry = MetricsRegistry()
+    errors = registry.counter("test_errors_total", "Errors.", ("message",))
+    errors.inc('say "hi"\\\n')
+    errors.inc('say "hi"\\\n', amount=2)
+    rendered = registry.render()
+    assert "# HELP test_errors_total Errors.\n# TYPE test_errors_total counter\n" in rendered
+    assert _lines(registry, "test_errors_total") == ['test_errors_total{message="say \\"hi\\"\\\\\\n"} 3.0']
+
+
+def test_callback_gauges_and_counters_read_on_scrape():
+    registry = MetricsRegistry()
+    state = {"depth": 1, "sent": 10}
+    registry.gauge("test_depth", "Depth.", callback=lambda: state["depth"])
+    registry.counter("test_sent_total", "Sent.", callback=lambda: state["sent"])
+    registry.gauge("test_broken", "Broken.", callback=lambda: 1 / 0)
+    assert _lines(registry, "test_depth") == ["test_depth 1"]
+    state.update(depth=0, sent=12)
+    assert _lines(registry, "test_depth") == ["test_depth 0"]
+    assert _lines(registry, "test_sent_total") == ["test_sent_total 12"]
+    assert _lines(registry, "test_broken") == []
+
+
+def test_register_queue_reports_depth_per_queue():
+    registry = MetricsRegistry()
+    registry.register_queue("socket_emit", lambda: 7)
+    registry.register_queue("broken", lambda: 1 / 0)
+    assert _lines(registry, "devika_queue_depth{") == ['devika_queue_depth{queue="socket_emit"} 7']
+
+
+def test_llm_observations():
+    registry = MetricsRegistry()
+    registry.observe_llm("ollama", "phi", seconds=2.0, tokens=100)
+    registry.observe_llm_error("ollama", "phi")
+    assert _lines(registry, "devika_llm_tokens_total{") == ['devika_llm_tokens_total{provider="ollama",model="phi"} 100.0']
+    assert _lines(registry, "devika_llm_tokens_per_second{") == [
+        'devika_llm_tokens_per_second{provider="ollama",model="phi"} 50.0'
+    ]
+    assert _lines(registry, "devika_llm_errors_total{") == ['devika_llm_errors_total{provider="ollama",model="phi"} 1.0']
+
+
+def test_request_hooks_label_by_url_rule():
+    flask = pytest.importorskip("flask")
+    app = flask.Flask(__name__)
+    registry = MetricsRegistry()
+    registry.instrument_app(app)
+
+    @app.route("/api/projects/<name>")
+    def project(name):
+        return name
+
+    client = app.test_client()
+    client.get("/api/projects/one")
+    client.get("/api/projects/two")
+    client.get("/missing")
+    counts = _lines(registry, "devika_http_request_duration_seconds_count")
+    assert counts == [
+        'devika_http_request_duration_seconds_count{route="/api/projects/<name>",method="GET",status="200"} 2',
+        'devika_http_request_duration_seconds_count{route="unmatched",method="GET",status="404"} 1',
+    ]
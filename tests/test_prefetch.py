@@ -0,0 +1,39 @@
+from src.agents.prefetch import ResearchPrefetcher
+
+
+class _Cache:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.data[key] = value
+
+
+def _prefetcher(searched, cache):
+    def search(query):
+        searched.append(query)
+        return f"https://example.com/{query.replace(' ', '-')}"
+
+    return ResearchPrefetcher(search, lambda url: f"page {url}", cache=cache)
+
+
+def test_last_plan_step_without_newline_is_speculated():
+    searched, cache = [], _Cache()
+    prefetcher = _prefetcher(searched, cache)
+    prefetcher.feed_plan("Step 1: flask rest api\nStep 2: sqlite schema")
+    results = prefetcher.resolve(["sqlite schema", "flask rest api"])
+    assert prefetcher.hits == 2
+    assert prefetcher.misses == 0
+    assert set(results) == {"sqlite schema", "flask rest api"}
+
+
+def test_used_pages_land_in_the_given_cache():
+    searched, cache = [], _Cache()
+    prefetcher = _prefetcher(searched, cache)
+    prefetcher.feed_plan("Step 1: flask rest api\nStep 2: kubernetes operators\n")
+    prefetcher.resolve(["flask rest api"])
+    assert list(cache.data) == ["https://example.com/flask-rest-api"]
+    assert prefetcher.discarded == 1
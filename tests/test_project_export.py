@@ -0,0 +1,125 @@
+import hashlib
+import io
+import json
+import os
+import zipfile
+
+import pytest
+
+from src import project_export, project_paths
+from src.project_export import (
+    CHUNK_SIZE, DELETED_ENTRY, ProjectExporter, SnapshotNotFound, content_disposition, stream_zip,
+)
+
+
+class _Config:
+    def __init__(self, projects_dir):
+        self.projects_dir = projects_dir
+
+    def get_projects_dir(self):
+        return self.projects_dir
+
+
+@pytest.fixture
+def projects_dir(tmp_path, monkeypatch):
+    root = tmp_path / "projects"
+    (root / "demo" / "sub").mkdir(parents=True)
+    (root / "demo" / "a.txt").write_text("a")
+    (root / "demo" / "sub" / "b.txt").write_text("b")
+    monkeypatch.setattr(project_paths, "get_config", lambda: _Config(str(root)))
+    return root
+
+
+def _unzip(chunks):
+    return zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+
+
+def test_full_export_contains_project_files(projects_dir):
+    snapshot_id, chunks = ProjectExporter().export("demo")
+    assert sorted(_unzip(chunks).namelist()) == ["a.txt", "sub/b.txt"]
+    assert ProjectExporter().list_snapshots("demo") == [snapshot_id]
+
+
+def test_incremental_export_contains_only_changes(projects_dir):
+    exporter = ProjectExporter()
+    base, chunks = exporter.export("demo")
+    b"".join(chunks)
+
+    (projects_dir / "demo" / "a.txt").write_text("changed")
+    (projects_dir / "demo" / "sub" / "b.txt").unlink()
+    (projects_dir / "demo" / "c.txt").write_text("c")
+
+    _, chunks = exporter.export("demo", since=base)
+    archive = _unzip(chunks)
+    assert sorted(archive.namelist()) == [DELETED_ENTRY, "a.txt", "c.txt"]
+    assert archive.read("a.txt") == b"changed"
+    assert archive.read(DELETED_ENTRY) == b"sub/b.txt"
+
+
+def test_aborted_export_does_not_record_snapshot(projects_dir):
+    exporter = ProjectExporter()
+    _, chunks = exporter.export("demo")
+    next(chunks)
+    chunks.close()
+    assert exporter.list_snapshots("demo") == []
+
+
+def test_unknown_snapshot_is_rejected(projects_dir):
+    with pytest.raises(SnapshotNotFound):
+        ProjectExporter().export("demo", since="../../etc")
+
+
+@pytest.mark.parametrize("name", ["..", "../..", "../../../../tmp", "/etc", "demo/../.."])
+def test_project_name_cannot_escape_projects_dir(projects_dir, name):
+    with pytest.raises(ValueError):
+        ProjectExporter().export(name)
+    with pytest.raises(ValueError):
+        ProjectExporter().list_snapshots(name)
+
+
+def test_stream_zip_yields_before_archive_is_complete(tmp_path):
+    big = tmp_path / "big.bin"
+    big.write_bytes(os.urandom(CHUNK_SIZE * 4))
+    chunks = list(stream_zip([("big.bin", str(big)), ("note.txt", b"hi")]))
+    assert len(chunks) > 2
+    archive = _unzip(chunks)
+    assert archive.read("big.bin") == big.read_bytes()
+    assert archive.read("note.txt") == b"hi"
+
+
+def _manifest(projects_dir, snapshot_id):
+    path = projects_dir / "demo" / ".devika" / "snapshots" / f"{snapshot_id}.json"
+    return json.loads(path.read_text())["files"]
+
+
+def test_full_export_hashes_while_streaming(projects_dir, monkeypatch):
+    def no_prehash(path):
+        raise AssertionError(f"{path} hashed outside the zip pass")
+
+    monkeypatch.setattr(project_export, "_hash_file", no_prehash)
+    snapshot_id, chunks = ProjectExporter().export("demo")
+    # Nothing has been read yet, so a later edit is what gets exported.
+    (projects_dir / "demo" / "a.txt").write_text("edited")
+    assert _unzip(chunks).read("a.txt") == b"edited"
+    assert _manifest(projects_dir, snapshot_id)["a.txt"]["sha256"] == hashlib.sha256(b"edited").hexdigest()
+
+
+def test_incremental_export_only_hashes_files_that_look_changed(projects_dir, monkeypatch):
+    exporter = ProjectExporter()
+    base, chunks = exporter.export("demo")
+    b"".join(chunks)
+
+    hashed = []
+    original = project_export._hash_file
+    monkeypatch.setattr(project_export, "_hash_file", lambda path: hashed.append(path) or original(path))
+    (projects_dir / "demo" / "c.txt").write_text("c")
+    _, chunks = exporter.export("demo", since=base)
+    assert sorted(_unzip(chunks).namelist()) == [DELETED_ENTRY, "c.txt"]
+    assert [os.path.basename(path) for path in hashed] == ["c.txt"]
+
+
+def test_content_disposition_quotes_spaces_and_unicode():
+    value = content_disposition('my "app" été.zip')
+    assert value == ('attachment; filename="my \\"app\\" ete.zip"; '
+                     "filename*=UTF-8''my%20%22app%22%20%C3%A9t%C3%A9.zip")
+    value.encode("latin-1")
@@ -0,0 +1,169 @@
+import asyncio
+import sys
+import textwrap
+
+import pytest
+
+from src.replay import ReplayMissError, UnrecordableResultError, _Session, record, replay
+
+
+FAKE_IO = textwrap.dedent("""
+    OFFLINE = False
+    sent = []
+
+
+    class Connector:
+        def send_request(self, prompt):
+            if OFFLINE:
+                raise ConnectionError("network disabled")
+            sent.append(prompt)
+            return f"raw {prompt}"
+
+
+    class LLM:
+        def __init__(self):
+            self.connector = Connector()
+
+        def inference(self, prompt):
+            return self.connector.send_request(prompt).upper()
+
+
+    class Search:
+        @staticmethod
+        def first_link(query):
+            if OFFLINE:
+                raise ConnectionError("network disabled")
+            return f"https://example.com/{query}"
+
+        async def fetch(self, url):
+            if OFFLINE:
+                raise ConnectionError("network disabled")
+            return f"<html>{url}</html>"
+
+
+    class QuotaError(Exception):
+        def __init__(self, provider, message):
+            super().__init__(f"{provider}: {message}")
+
+
+    class Browser:
+        def screenshot(self):
+            if OFFLINE:
+                raise ConnectionError("network disabled")
+            return b"\\x89PNG", (b"meta", 1)
+
+        def slow(self):
+            raise TimeoutError("model took too long")
+
+        def quota(self):
+            raise QuotaError("openai", "rate limited")
+
+        def handle(self):
+            return object()
+""")
+
+TARGETS = (
+    "fake_io.Connector.send_request",
+    "fake_io.LLM.inference",
+    "fake_io.Search.first_link",
+    "fake_io.Search.fetch",
+    "fake_io.Browser.screenshot",
+    "fake_io.Browser.slow",
+    "fake_io.Browser.quota",
+    "fake_io.Browser.handle",
+)
+
+
+@pytest.fixture
+def fake_io(tmp_path, monkeypatch):
+    (tmp_path / "fake_io.py").write_text(FAKE_IO)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import fake_io
+    yield fake_io
+    sys.modules.pop("fake_io", None)
+
+
+def _agent(fake_io, prompt="todo app"):
+    from fake_io import LLM, Search
+    plan = LLM().inference(prompt)
+    url = Search.first_link("flask")
+    page = asyncio.run(Search().fetch(url))
+    return plan, url, page
+
+
+def test_record_then_replay_offline(fake_io, tmp_path):
+    fixture = str(tmp_path / "run.json")
+    with record(fixture, targets=TARGETS) as recorder:
+        expected = _agent(fake_io)
+    # The nested Connector.send_request call is not recorded separately.
+    assert [call["target"] for call in recorder.calls] == [
+        "fake_io.LLM.inference", "fake_io.Search.first_link", "fake_io.Search.fetch",
+    ]
+
+    fake_io.OFFLINE = True
+    for _ in range(2):
+        with replay(fixture, targets=TARGETS) as replayer:
+            assert _agent(fake_io) == expected
+        stats = replayer.stats()
+        assert stats["misses"] == 0
+        assert stats["replayed"] == stats["recorded_calls"] == 3
+    assert fake_io.sent == ["todo app"]
+
+
+def test_replay_miss_is_counted(fake_io, tmp_path):
+    fixture = str(tmp_path / "run.json")
+    with record(fixture, targets=TARGETS):
+        _agent(fake_io)
+
+    fake_io.OFFLINE = True
+    with replay(fixture, targets=TARGETS) as replayer:
+        with pytest.raises(ReplayMissError):
+            _agent(fake_io, prompt="different prompt")
+    assert replayer.stats()["misses"] == 1
+
+    with replay(fixture, targets=TARGETS, strict=False) as replayer:
+        _agent(fake_io, prompt="different prompt")
+    assert replayer.stats()["fuzzy_matches"] == 1
+    assert replayer.stats()["misses"] == 0
+
+
+def test_uninstall_restores_originals(fake_io, tmp_path):
+    originals = (fake_io.LLM.__dict__["inference"], fake_io.Search.__dict__["first_link"])
+    with record(str(tmp_path / "run.json"), targets=TARGETS):
+        pass
+    assert (fake_io.LLM.__dict__["inference"], fake_io.Search.__dict__["first_link"]) == originals
+
+
+def test_bytes_and_tuples_round_trip(fake_io, tmp_path):
+    fixture = str(tmp_path / "run.json")
+    with record(fixture, targets=TARGETS):
+        expected = fake_io.Browser().screenshot()
+    fake_io.OFFLINE = True
+    with replay(fixture, targets=TARGETS):
+        assert fake_io.Browser().screenshot() == expected == (b"\x89PNG", (b"meta", 1))
+
+
+def test_errors_are_replayed_with_their_original_type(fake_io, tmp_path):
+    fixture = str(tmp_path / "run.json")
+    with record(fixture, targets=TARGETS):
+        for method in ("slow", "quota"):
+            with pytest.raises(Exception):
+                getattr(fake_io.Browser(), method)()
+
+    with replay(fixture, targets=TARGETS):
+        with pytest.raises(TimeoutError, match="model took too long"):
+            fake_io.Browser().slow()
+        with pytest.raises(fake_io.QuotaError, match="openai: rate limited"):
+            fake_io.Browser().quota()
+
+
+def test_unrecordable_result_fails_the_recording(fake_io, tmp_path):
+    with record(str(tmp_path / "run.json"), targets=TARGETS) as recorder:
+        with pytest.raises(UnrecordableResultError, match="Browser.handle"):
+            fake_io.Browser().handle()
+    assert recorder.unrecordable and not recorder.calls
+
+
+def test_session_requires_a_wrapper():
+    with pytest.raises(TypeError):
+        _Session(TARGETS)
@@ -0,0 +1,114 @@
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from src import project_paths
+from src.sandbox import SandboxLimits, SandboxPool
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="process groups and rlimits are POSIX only")
+
+
+class _Config:
+    def __init__(self, projects_dir):
+        self.projects_dir = projects_dir
+
+    def get_projects_dir(self):
+        return self.projects_dir
+
+
+@pytest.fixture(autouse=True)
+def projects_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(project_paths, "get_config", lambda: _Config(str(tmp_path)))
+    return tmp_path
+
+
+def _run(code, **limits):
+    output = []
+    pool = SandboxPool(size=0, limits=SandboxLimits(**limits))
+    result = pool.run("demo", code, on_output=lambda stream, text: output.append((stream, text)))
+    return result, "".join(text for stream, text in output if stream == "stdout"), output
+
+
+def test_runs_code_in_project_dir(projects_dir):
+    result, stdout, _ = _run("import os, sys\nprint(os.getcwd())\nsys.exit(3)")
+    assert result.returncode == 3
+    assert not result.timed_out
+    assert stdout.strip() == str(projects_dir / "demo")
+
+
+def test_wall_clock_timeout_kills_worker():
+    start = time.monotonic()
+    result, _, _ = _run("while True: pass", wall_seconds=1)
+    assert result.timed_out
+    assert time.monotonic() - start < 5
+
+
+def test_background_child_in_group_does_not_block_run():
+    code = (
+        "import subprocess, sys\n"
+        "subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])\n"
+        "print('done')\n"
+    )
+    start = time.monotonic()
+    result, stdout, _ = _run(code, wall_seconds=10)
+    assert time.monotonic() - start < 5
+    assert stdout.strip() == "done"
+    assert not result.timed_out
+
+
+def test_child_that_leaves_group_is_bounded_by_wall_clock():
+    code = (
+        "import subprocess, sys\n"
+        "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'], start_new_session=True)\n"
+        "print(child.pid, flush=True)\n"
+    )
+    start = time.monotonic()
+    result, stdout, _ = _run(code, wall_seconds=1)
+    try:
+        assert time.monotonic() - start < 5
+        assert result.timed_out
+    finally:
+        os.kill(int(stdout.split()[0]), signal.SIGKILL)
+
+
+def test_output_is_truncated_at_budget():
+    result, stdout, _ = _run("print('x' * 150)", max_output_bytes=100)
+    assert result.truncated
+    assert len(stdout) == 100
+
+
+def test_project_name_cannot_escape_projects_dir():
+    with pytest.raises(ValueError):
+        SandboxPool(size=0).run("../outside", "print(1)")
+
+
+class _FakeWorker:
+    def __init__(self):
+        self.killed = False
+
+    def wait(self):
+        pass
+
+
+def test_concurrent_refills_do_not_overshoot_pool_size(monkeypatch):
+    pool = SandboxPool(size=2)
+    spawned = []
+
+    def spawn():
+        time.sleep(0.02)
+        worker = _FakeWorker()
+        spawned.append(worker)
+        return worker
+
+    monkeypatch.setattr(pool, "_spawn", spawn)
+    monkeypatch.setattr(pool, "_kill", lambda worker: setattr(worker, "killed", True))
+    refills = [threading.Thread(target=pool._refill) for _ in range(5)]
+    for refill in refills:
+        refill.start()
+    for refill in refills:
+        refill.join()
+    assert len(pool._idle) == 2
+    assert all(worker.killed for worker in spawned if worker not in pool._idle)
@@ -0,0 +1,141 @@
+from src.socket_batcher import BROADCAST, EmitBatcher
+
+
+class _FakeSocketIO:
+    def __init__(self):
+        self.sent = []
+
+    def emit(self, event, data, to=None, skip_sid=None, callback=None, ignore_queue=False):
+        self.sent.append({"event": event, "data": data, "to": to, "skip_sid": skip_sid,
+                          "callback": callback, "ignore_queue": ignore_queue})
+
+
+def _batcher(**kwargs):
+    socketio = _FakeSocketIO()
+    batcher = EmitBatcher(socketio, **kwargs)
+    return batcher, socketio
+
+
+def test_state_events_are_merged_per_project():
+    batcher, socketio = _batcher()
+    batcher.connect("a")
+    batcher.emit("agent-state", {"project_name": "p", "step": 1})
+    batcher.emit("agent-state", {"project_name": "q", "step": 1})
+    batcher.emit("agent-state", {"project_name": "p", "step": 2})
+    batcher.flush()
+    assert [m["data"] for m in socketio.sent] == [
+        {"project_name": "q", "step": 1}, {"project_name": "p", "step": 2},
+    ]
+    assert batcher.merged == 1
+
+
+def test_code_output_chunks_are_concatenated():
+    batcher, socketio = _batcher()
+    batcher.connect("a")
+    for text in ("he", "llo"):
+        batcher.emit("code-output", {"project_name": "p", "stream": "stdout", "data": text}, False)
+    batcher.emit("code-output", {"project_name": "p", "stream": "stderr", "data": "!"}, False)
+    batcher.flush()
+    assert [m["data"]["data"] for m in socketio.sent] == ["hello", "!"]
+
+
+def test_full_buffer_drops_logs_before_terminal_events():
+    batcher, socketio = _batcher(capacity=3)
+    batcher.connect("a")
+    for i in range(3):
+        batcher.emit("info", {"i": i})
+    batcher.emit("code-exit", {"project_name": "p"})
+    assert batcher.buffered() == 3
+    batcher.flush()
+    assert [m["event"] for m in socketio.sent] == ["info", "info", "code-exit"]
+    assert batcher.dropped == 1
+
+
+def test_buffer_stays_bounded_with_only_undroppable_events():
+    batcher, _ = _batcher(capacity=3)
+    batcher.connect("a")
+    for i in range(10):
+        batcher.emit("code-exit", {"run_id": i})
+    assert batcher.buffered() == 3
+    assert batcher.dropped == 7
+
+
+def test_one_batch_in_flight_until_acked():
+    batcher, socketio = _batcher()
+    batcher.set_batching("a", True)
+    batcher.emit("info", {"i": 1})
+    batcher.flush()
+    assert len(socketio.sent) == 1
+    frame = socketio.sent[0]
+    assert frame["event"] == "batch" and frame["to"] == "a"
+
+    batcher.emit("info", {"i": 2})
+    batcher.flush()
+    assert len(socketio.sent) == 1
+    assert batcher.stats()["in_flight"] == 1
+
+    frame["callback"]()
+    batcher.flush()
+    assert len(socketio.sent) == 2
+    assert socketio.sent[1]["data"] == [["info", {"i": 2}]]
+
+
+def test_missing_ack_times_out():
+    batcher, socketio = _batcher(ack_timeout=0)
+    batcher.set_batching("a", True)
+    batcher.emit("info", {"i": 1})
+    batcher.flush()
+    batcher.emit("info", {"i": 2})
+    batcher.flush()
+    assert len(socketio.sent) == 2
+    assert batcher.ack_timeouts == 1
+
+
+def test_unbatched_clients_are_not_ack_gated():
+    batcher, socketio = _batcher()
+    batcher.connect("a")
+    batcher.emit("info", {"i": 1})
+    batcher.flush()
+    batcher.emit("info", {"i": 2})
+    batcher.flush()
+    assert [m["callback"] for m in socketio.sent] == [None, None]
+
+
+def test_remote_relay_skips_local_clients():
+    batcher, socketio = _batcher(relay_remote=True)
+    batcher.connect("a")
+    batcher.emit("info", {"i": 1})
+    batcher.flush()
+    assert {(m["to"], tuple(m["skip_sid"] or ()), m["ignore_queue"]) for m in socketio.sent} == {
+        ("a", (), True), (None, ("a",), False),
+    }
+    assert BROADCAST not in [m["to"] for m in socketio.sent]
+
+
+def test_inference_errors_are_not_replaced_by_time_ticks():
+    batcher, socketio = _batcher()
+    batcher.connect("a")
+    batcher.emit("inference", {"type": "time", "elapsed_time": 1})
+    batcher.emit("inference", {"type": "error", "message": "model not found"})
+    batcher.emit("inference", {"type": "time", "elapsed_time": 2})
+    batcher.emit("inference", {"type": "warning", "message": "slow"})
+    batcher.flush()
+    assert [m["data"] for m in socketio.sent] == [
+        {"type": "error", "message": "model not found"},
+        {"type": "time", "elapsed_time": 2},
+        {"type": "warning", "message": "slow"},
+    ]
+
+
+def test_state_stacks_merge_per_project_only():
+    batcher, socketio = _batcher()
+    batcher.connect("a")
+    batcher.emit("agent-state", [{"project_name": "p", "step": 1}])
+    batcher.emit("agent-state", [{"project_name": "q", "step": 1}])
+    batcher.emit("agent-state", [{"project_name": "p", "step": 1}, {"project_name": "p", "step": 2}])
+    batcher.emit("agent-state", [{"step": 1}])
+    batcher.emit("agent-state", [{"step": 2}])
+    batcher.flush()
+    assert [m["data"][-1] for m in socketio.sent] == [
+        {"project_name": "q", "step": 1}, {"project_name": "p", "step": 2}, {"step": 1}, {"step": 2},
+    ]
@@ -0,0 +1,21 @@
+import pytest
+
+from src.database import sqlite_wal
+
+
+def test_connect_applies_pragmas(tmp_path):
+    connection = sqlite_wal.connect(str(tmp_path / "devika.db"))
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert connection.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+    assert connection.execute("PRAGMA foreign_keys").fetchone()[0] == 0
+    connection.close()
+
+
+def test_enable_wal_everywhere_covers_new_engines(tmp_path):
+    sqlalchemy = pytest.importorskip("sqlalchemy")
+    sqlite_wal.enable_wal_everywhere()
+    sqlite_wal.enable_wal_everywhere()
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'devika.db'}")
+    with engine.connect() as connection:
+        mode = connection.exec_driver_sql("PRAGMA journal_mode").scalar()
+    assert mode == "wal"
@@ -0,0 +1,144 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from src.monitoring import tracing
+from src.monitoring.tracing import attach, current_run, current_span, span, trace_run
+
+
+def _names(span_dict):
+    return [child["name"] for child in span_dict["children"]]
+
+
+def test_spans_nest_and_run_is_saved(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "_trace_dir", lambda project: str(tmp_path))
+    with trace_run("demo") as run:
+        with span("planner") as s:
+            s.add(tokens=10)
+            s.add(tokens=5)
+            with span("llm"):
+                pass
+        with span("coder"):
+            pass
+    assert current_run() is None
+    saved = tracing.load_run("demo", run.run_id)
+    assert _names(saved["trace"]) == ["planner", "coder"]
+    planner = saved["trace"]["children"][0]
+    assert planner["attributes"] == {"tokens": 15}
+    assert _names(planner) == ["llm"]
+
+
+def test_span_outside_run_is_noop():
+    with span("orphan") as s:
+        s.set(cache_hit=True)
+    assert current_span() is None
+
+
+def test_attached_thread_keeps_its_own_stack(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "_trace_dir", lambda project: str(tmp_path))
+    inside_worker = threading.Event()
+    release_worker = threading.Event()
+
+    with trace_run("demo") as run:
+        with span("research") as research:
+            def worker():
+                with attach(run, research), span("prefetch"):
+                    inside_worker.set()
+                    release_worker.wait(5)
+
+            thread = threading.Thread(target=worker)
+            thread.start()
+            inside_worker.wait(5)
+            # Spans opened here while the worker is attached must not nest
+            # under the worker's open span.
+            with span("search"):
+                pass
+            release_worker.set()
+            thread.join()
+        with span("coder"):
+            pass
+
+    assert _names(run.root.to_dict()) == ["research", "coder"]
+    assert _names(research.to_dict()) == ["prefetch", "search"]
+
+
+def test_trace_dir_rejects_names_outside_projects_dir(tmp_path, monkeypatch):
+    from src import project_paths
+
+    class _Config:
+        def get_projects_dir(self):
+            return str(tmp_path)
+
+    monkeypatch.setattr(project_paths, "get_config", lambda: _Config())
+    assert tracing._trace_dir("Demo App") == str(tmp_path / "demo-app" / ".devika" / "run-traces")
+    for name in ("..", "../../etc", "/tmp"):
+        with pytest.raises(ValueError):
+            tracing.list_runs(name)
+
+
+PROFILE_UNDER_GEVENT = """
+from gevent import monkey
+monkey.patch_all()
+import sys, threading, time
+import gevent
+sys.path.insert(0, sys.argv[1])
+from src.monitoring import tracing
+tracing._save = lambda run: None
+
+
+def spin_agent():
+    sum(range(20000))
+
+
+def spin_other():
+    sum(range(20000))
+
+
+def other():
+    while not done:
+        spin_other()
+        gevent.sleep(0)
+
+
+def agent():
+    with tracing.trace_run("demo", profile=True) as run:
+        deadline = time.time() + 0.5
+        while time.time() < deadline:
+            spin_agent()
+            gevent.sleep(0)
+    print(run.profiler.folded())
+
+
+done = False
+distraction = threading.Thread(target=other)
+distraction.start()
+worker = threading.Thread(target=agent)
+worker.start()
+worker.join()
+done = True
+distraction.join()
+"""
+
+
+def test_profiler_samples_the_run_greenlet_under_gevent(tmp_path):
+    pytest.importorskip("gevent")
+    script = tmp_path / "profile_gevent.py"
+    script.write_text(PROFILE_UNDER_GEVENT)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    folded = subprocess.run([sys.executable, str(script), root], capture_output=True, text=True,
+                            check=True, timeout=30).stdout
+    assert "spin_agent" in folded
+    assert "spin_other" not in folded
+
+
+def test_profiler_samples_plain_threads(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "_trace_dir", lambda project: str(tmp_path))
+    with trace_run("demo", profile=True) as run:
+        deadline = time.time() + 0.2
+        while time.time() < deadline:
+            sum(range(20000))
+    assert run.profiler.samples